@@ -4,18 +4,20 @@ Database sync operations for cast and voice data.
 
 from __future__ import annotations
 
-import time
+import json
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from notion_client import Client
 
 from .sync import (
+    AdaptiveLimiter,
     get_or_create_database,
     query_data_source,
     create_database_row,
     update_database_row,
     rich_text_plain,
+    sha1_text,
 )
 from .parsers import normalize_gbf_media_url
 
@@ -36,6 +38,61 @@ VOICE_SCHEMA = {
 }
 
 
+# Shared across databases so backoff carries over between files
+_row_limiter = AdaptiveLimiter()
+
+VOICE_TEXT_FIELDS = ("Japanese", "Chinese", "English")
+
+
+# Properties must include "type" field for data_source_id parent
+def _cast_properties(name: str, stable_url: str, wiki_url: str | None) -> dict:
+    """Build row properties for a cast portrait."""
+    properties = {
+        "Name": {"type": "title", "title": [{"type": "text", "text": {"content": name}}]},
+        "Portrait": {"type": "files", "files": [{"type": "external", "name": name, "external": {"url": stable_url}}]},
+    }
+    if wiki_url:
+        properties["WikiUrl"] = {"type": "url", "url": wiki_url}
+    return properties
+
+
+def _voice_properties(label: str, item: dict, audio_url: str) -> dict:
+    """Build row properties for a voice line, omitting empty fields."""
+    properties = {
+        "Label": {"type": "title", "title": [{"type": "text", "text": {"content": label}}]},
+    }
+    for field in VOICE_TEXT_FIELDS:
+        text = item.get(field)
+        if text:
+            properties[field] = {"type": "rich_text", "rich_text": [{"type": "text", "text": {"content": text}}]}
+    if audio_url:
+        properties["Audio"] = {"type": "files", "files": [{"type": "external", "name": label, "external": {"url": audio_url}}]}
+    return properties
+
+
+def _row_hash(properties: dict) -> str:
+    """Stable hash of a row payload (canonical JSON)."""
+    return sha1_text(json.dumps(properties, sort_keys=True, ensure_ascii=False))
+
+
+def _write_row(
+    client: "Client",
+    ds_id: str,
+    row_id: str | None,
+    properties: dict,
+    row_hashes: dict,
+) -> None:
+    """Create or update a row, skipping updates whose payload hash is unchanged."""
+    row_hash = _row_hash(properties)
+    if row_id:
+        if row_hashes.get(row_id) == row_hash:
+            return
+        _row_limiter.call(update_database_row, client, row_id, properties)
+    else:
+        row_id = _row_limiter.call(create_database_row, client, ds_id, properties)
+    row_hashes[row_id] = row_hash
+
+
 def _build_title_index(client: "Client", ds_id: str, title_prop: str = "Name") -> dict[str, str]:
     """Build index of existing rows: title -> row_id."""
     index = {}
@@ -64,7 +121,7 @@ def sync_cast_database(
         client: Notion client
         parent_id: Parent page ID
         rows: List of {name, image_url, wiki_url?}
-        cache: Optional cache dict (unused, for API compatibility)
+        cache: Optional sync cache; row payload hashes are kept under "row_hashes"
         mode: "diff" or "force"
         dry_run: Skip actual writes
     
@@ -78,6 +135,7 @@ def sync_cast_database(
     
     # Build index of existing rows
     existing = _build_title_index(client, ds_id, "Name")
+    row_hashes = cache.setdefault("row_hashes", {}) if cache is not None else {}
     
     for row_data in rows:
         name = row_data.get('name', '')
@@ -87,25 +145,13 @@ def sync_cast_database(
         if not name or not image_url:
             continue
         
-        stable_url = normalize_gbf_media_url(image_url)
-        
-        # Properties must include "type" field for data_source_id parent
-        properties = {
-            "Name": {"type": "title", "title": [{"type": "text", "text": {"content": name}}]},
-            "Portrait": {"type": "files", "files": [{"type": "external", "name": name, "external": {"url": stable_url}}]},
-        }
-        if wiki_url:
-            properties["WikiUrl"] = {"type": "url", "url": wiki_url}
+        properties = _cast_properties(name, normalize_gbf_media_url(image_url), wiki_url)
         
         row_id = existing.get(name)
+        if row_id and mode != "force":
+            continue  # Skip existing in diff mode
         try:
-            if row_id:
-                if mode != "force":
-                    continue  # Skip existing in diff mode
-                update_database_row(client, row_id, properties)
-            else:
-                create_database_row(client, ds_id, properties)
-            time.sleep(0.05)
+            _write_row(client, ds_id, row_id, properties, row_hashes)
         except Exception:
             pass  # Silently continue on errors
     
@@ -130,7 +176,7 @@ def sync_voice_database(
         parent_id: Parent page ID
         title: Database title prefix
         voice_data: List of {Label, Japanese, Chinese, English, Audio}
-        cache: Optional cache dict (unused)
+        cache: Optional sync cache; row payload hashes are kept under "row_hashes"
         mode: "diff" or "force"
         dry_run: Skip actual writes
     
@@ -144,6 +190,7 @@ def sync_voice_database(
         return db_id
     
     existing = _build_title_index(client, ds_id, "Label")
+    row_hashes = cache.setdefault("row_hashes", {}) if cache is not None else {}
     
     for item in voice_data:
         label = item.get("Label", "Unknown")
@@ -154,29 +201,13 @@ def sync_voice_database(
         if audio_url:
             audio_url = normalize_gbf_media_url(audio_url)
         
-        # Properties must include "type" field for data_source_id parent
-        properties = {
-            "Label": {"type": "title", "title": [{"type": "text", "text": {"content": label}}]},
-        }
-        
-        if item.get("Japanese"):
-            properties["Japanese"] = {"type": "rich_text", "rich_text": [{"type": "text", "text": {"content": item["Japanese"]}}]}
-        if item.get("Chinese"):
-            properties["Chinese"] = {"type": "rich_text", "rich_text": [{"type": "text", "text": {"content": item["Chinese"]}}]}
-        if item.get("English"):
-            properties["English"] = {"type": "rich_text", "rich_text": [{"type": "text", "text": {"content": item["English"]}}]}
-        if audio_url:
-            properties["Audio"] = {"type": "files", "files": [{"type": "external", "name": label, "external": {"url": audio_url}}]}
+        properties = _voice_properties(label, item, audio_url)
         
         row_id = existing.get(label)
+        if row_id and mode != "force":
+            continue
         try:
-            if row_id:
-                if mode != "force":
-                    continue
-                update_database_row(client, row_id, properties)
-            else:
-                create_database_row(client, ds_id, properties)
-            time.sleep(0.05)
+            _write_row(client, ds_id, row_id, properties, row_hashes)
         except Exception:
             pass
     
@@ -5,22 +5,78 @@ Table parsing utilities for cast and voice markdown files.
 from __future__ import annotations
 
 import re
+from functools import lru_cache
 
 
+# Full-size file path, or the original filename inside a thumbnail path
+_GBF_IMAGE_PATH_RE = re.compile(
+    r"/images/(?:(?:thumb/)?[0-9a-f]/[0-9a-f]{2}/([^/]+)$"
+    r"|thumb/[0-9a-f]/[0-9a-f]{2}/([^/]+)/)"
+)
+_IMAGE_LINK_RE = re.compile(r'!\[[^\]]*\]\(([^)]+)\)')
+_NAME_LINK_RE = re.compile(r'\|\s*\[([^\]]+)\]\((https?://[^\s)]+)\)')
+_SIMPLE_NAME_RE = re.compile(r'^\|\s*([^|\[]+?)\s*\|')
+_AUDIO_LINK_RE = re.compile(r'\[.*?\]\((https?://[^\s)]+)\)')
+
+# Exact header cell -> column key (checked before the substring fallbacks)
+_VOICE_HEADER_EXACT = {
+    'label': 'Label',
+    'jp': 'Japanese',
+    'cn': 'Chinese',
+    'en': 'English',
+}
+
+
+def _split_pipes(line: str) -> list[str]:
+    """
+    Split a stripped ``|``-delimited table line into stripped cells.
+
+    Equivalent to ``line.split('|')`` minus the empty outer cells, but walks
+    the line with ``str.find`` instead of materializing the raw split list.
+    """
+    end = len(line)
+    if end < 2:
+        return []
+    if line[-1] == '|':
+        end -= 1
+    cells = []
+    start = 1
+    while True:
+        idx = line.find('|', start, end)
+        if idx == -1:
+            cells.append(line[start:end].strip())
+            return cells
+        cells.append(line[start:idx].strip())
+        start = idx + 1
+
+
+def _voice_header_key(cell: str) -> str | None:
+    """Map a lowercased header cell to its voice column key."""
+    key = _VOICE_HEADER_EXACT.get(cell)
+    if key:
+        return key
+    if 'label' in cell and len(cell) < 15:
+        return 'Label'
+    if 'japanese' in cell:
+        return 'Japanese'
+    if 'chinese' in cell:
+        return 'Chinese'
+    if 'english' in cell:
+        return 'English'
+    if 'audio' in cell:
+        return 'Audio'
+    return None
+
+
+@lru_cache(maxsize=4096)
 def normalize_gbf_media_url(url: str) -> str:
     """Convert GBF wiki thumbnail URL to stable FilePath URL."""
     if not url or not url.startswith("https://gbf.wiki/"):
         return url
     
-    # Extract filename from various URL patterns
-    patterns = [
-        r"/images/(?:thumb/)?[0-9a-f]/[0-9a-f]{2}/([^/]+)$",
-        r"/images/thumb/[0-9a-f]/[0-9a-f]{2}/([^/]+)/",
-    ]
-    for pattern in patterns:
-        m = re.search(pattern, url)
-        if m:
-            return f"https://gbf.wiki/Special:FilePath/{m.group(1)}"
+    m = _GBF_IMAGE_PATH_RE.search(url)
+    if m:
+        return f"https://gbf.wiki/Special:FilePath/{m.group(1) or m.group(2)}"
     return url
 
 
@@ -45,13 +101,13 @@ def parse_cast_table(content: str) -> list[dict]:
             continue
         
         # Extract image URL
-        img_match = re.search(r'!\[[^\]]*\]\(([^)]+)\)', line)
+        img_match = _IMAGE_LINK_RE.search(line)
         if not img_match:
             continue
         image_url = img_match.group(1).strip()
         
         # Extract name and wiki URL
-        link_match = re.search(r'\|\s*\[([^\]]+)\]\((https?://[^\s)]+)\)', line)
+        link_match = _NAME_LINK_RE.search(line)
         if link_match:
             rows.append({
                 'name': link_match.group(1).strip(),
@@ -61,7 +117,7 @@ def parse_cast_table(content: str) -> list[dict]:
             continue
         
         # Simple name without link
-        simple_match = re.search(r'^\|\s*([^|\[]+?)\s*\|', line)
+        simple_match = _SIMPLE_NAME_RE.match(line)
         if simple_match:
             name = simple_match.group(1).strip()
             if name:
@@ -100,40 +156,20 @@ def parse_voice_table(content: str) -> list[dict]:
             continue
         
         # Split and keep empty cells (important for column mapping)
-        cells = line.split('|')
-        # Remove first and last empty elements from | delimited line
-        if cells and cells[0].strip() == '':
-            cells = cells[1:]
-        if cells and cells[-1].strip() == '':
-            cells = cells[:-1]
-        cells = [c.strip() for c in cells]
-        
+        cells = _split_pipes(line)
         if not cells:
             continue
         
         # Detect if this is a header row (for multi-table files)
-        is_header_row = False
         temp_col_map = {}
         for i, cell in enumerate(cells):
-            cl = cell.lower()
-            if cl == 'label' or (cl and 'label' in cl and len(cl) < 15):
-                temp_col_map['Label'] = i
-                is_header_row = True
-            elif 'japanese' in cl or cl == 'jp':
-                temp_col_map['Japanese'] = i
-                is_header_row = True
-            elif 'chinese' in cl or cl == 'cn':
-                temp_col_map['Chinese'] = i
-                is_header_row = True
-            elif 'english' in cl or cl == 'en':
-                temp_col_map['English'] = i
-                is_header_row = True
-            elif 'audio' in cl:
-                temp_col_map['Audio'] = i
-                is_header_row = True
+            if cell:
+                key = _voice_header_key(cell.lower())
+                if key:
+                    temp_col_map[key] = i
         
         # If this looks like a header row, update col_map and skip
-        if is_header_row and len(temp_col_map) >= 2:
+        if len(temp_col_map) >= 2:
             col_map = temp_col_map
             header_found = False  # Wait for --- separator
             continue
@@ -148,7 +184,7 @@ def parse_voice_table(content: str) -> list[dict]:
             if idx < len(cells):
                 value = cells[idx]
                 if key == 'Audio':
-                    m = re.search(r'\[.*?\]\((https?://[^\s)]+)\)', value)
+                    m = _AUDIO_LINK_RE.search(value)
                     if m:
                         value = m.group(1)
                     elif not value.startswith('http'):
@@ -23,6 +23,20 @@ def _rt(text: str, *, bold: bool = False, italic: bool = False, color: str = "de
     }]
 
 
+_HEADING_TYPES = {1: "heading_1", 2: "heading_2", 3: "heading_3"}
+
+
+def _paragraph(rich_text: list[dict]) -> dict:
+    """Build a paragraph block."""
+    return {"object": "block", "type": "paragraph", "paragraph": {"rich_text": rich_text}}
+
+
+def _heading(level: int, rich_text: list[dict]) -> dict:
+    """Build a heading block (level 1-3)."""
+    htype = _HEADING_TYPES[level]
+    return {"object": "block", "type": htype, htype: {"rich_text": rich_text}}
+
+
 def _split_text(s: str, max_len: int = 1800) -> list[str]:
     """Split long text for Notion block limits (2000 char max)."""
     s = s.strip()
@@ -58,11 +72,7 @@ def render_story_blocks(content: str) -> list[dict]:
 
     def add_paragraph(text: str, *, italic: bool = False, color: str = "default", bold: bool = False):
         for part in _split_text(text):
-            blocks.append({
-                "object": "block",
-                "type": "paragraph",
-                "paragraph": {"rich_text": _rt(part, italic=italic, color=color, bold=bold)}
-            })
+            blocks.append(_paragraph(_rt(part, italic=italic, color=color, bold=bold)))
 
     for raw in content.splitlines():
         s = raw.strip()
@@ -73,12 +83,7 @@ def render_story_blocks(content: str) -> list[dict]:
         m = title_re.match(s)
         if m:
             level = min(len(m.group(1)), 3)
-            htype = f"heading_{level}"
-            blocks.append({
-                "object": "block",
-                "type": htype,
-                htype: {"rich_text": _rt(m.group(2).strip(), bold=True)}
-            })
+            blocks.append(_heading(level, _rt(m.group(2).strip(), bold=True)))
             continue
 
         # Speaker line: **Name：** text
@@ -87,11 +92,7 @@ def render_story_blocks(content: str) -> list[dict]:
             seen_dialogue = True
             speaker = m.group(1).strip()
             first_text = m.group(2).strip()
-            blocks.append({
-                "object": "block",
-                "type": "heading_3",
-                "heading_3": {"rich_text": _rt(speaker, bold=True, color="blue")}
-            })
+            blocks.append(_heading(3, _rt(speaker, bold=True, color="blue")))
             if first_text:
                 add_paragraph(first_text)
             continue
@@ -144,21 +145,12 @@ def render_profile_blocks(content: str) -> list[dict]:
         m = title_re.match(s)
         if m:
             level = min(len(m.group(1)), 3)
-            htype = f"heading_{level}"
-            blocks.append({
-                "object": "block",
-                "type": htype,
-                htype: {"rich_text": _rt(m.group(2).strip(), bold=True)}
-            })
+            blocks.append(_heading(level, _rt(m.group(2).strip(), bold=True)))
             continue
         
         # Data source link
         if s.startswith("数据源："):
-            blocks.append({
-                "object": "block",
-                "type": "paragraph",
-                "paragraph": {"rich_text": _rt(s, italic=True, color="gray")}
-            })
+            blocks.append(_paragraph(_rt(s, italic=True, color="gray")))
             continue
         
         # Profile entry: **Key**: Value
@@ -181,20 +173,12 @@ def render_profile_blocks(content: str) -> list[dict]:
                 }
             ]
             
-            blocks.append({
-                "object": "block",
-                "type": "paragraph",
-                "paragraph": {"rich_text": rich_text}
-            })
+            blocks.append(_paragraph(rich_text))
             continue
         
         # Other lines (description, etc.)
         if s:
-            blocks.append({
-                "object": "block",
-                "type": "paragraph",
-                "paragraph": {"rich_text": _rt(s)}
-            })
+            blocks.append(_paragraph(_rt(s)))
     
     return blocks
 
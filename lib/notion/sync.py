@@ -11,8 +11,9 @@ from __future__ import annotations
 
 import hashlib
 import json
+import time
 from pathlib import Path
-from typing import Any, Optional, Callable
+from typing import Any, Optional, Callable, Iterable, Iterator
 
 from notion_client import Client
 
@@ -107,9 +108,9 @@ class SyncContext:
         Returns True if updated, False if skipped.
         """
         if block_text_fn is None:
-            block_text_fn = blocks_plain_text
-        desired_text = normalize_text_for_diff(block_text_fn(blocks))
-        desired_hash = sha1_text(desired_text)
+            desired_hash = hash_blocks_normalized(blocks)
+        else:
+            desired_hash = sha1_text(normalize_text_for_diff(block_text_fn(blocks)))
 
         if self.mode != "force":
             cached_hash = self._get_cached("hashes", cache_key)
@@ -147,6 +148,89 @@ class SyncContext:
         return page_id
 
 
+# =============================================================================
+# RATE LIMITING
+# =============================================================================
+
+# Statuses worth retrying after backing off (rate limit / transient upstream)
+RETRYABLE_STATUSES = {429, 502, 503, 504}
+
+
+class AdaptiveLimiter:
+    """
+    Pace API writes by observed throttling instead of a fixed sleep.
+
+    Calls go out back-to-back until Notion answers 429/5xx; the interval
+    between calls then grows (honoring Retry-After) and shrinks again after
+    a streak of successes.
+
+    Usage:
+        limiter = AdaptiveLimiter()
+        limiter.call(update_database_row, client, row_id, properties)
+    """
+
+    def __init__(
+        self,
+        *,
+        base_interval: float = 0.34,
+        max_interval: float = 10.0,
+        recover_after: int = 10,
+        max_retries: int = 3,
+    ):
+        self.base_interval = base_interval  # ~3 req/s, Notion's average limit
+        self.max_interval = max_interval
+        self.recover_after = recover_after
+        self.max_retries = max_retries
+        self.interval = 0.0
+        self._last_call = 0.0
+        self._streak = 0
+
+    def acquire(self) -> None:
+        """Sleep only as long as the current interval requires."""
+        wait = self._last_call + self.interval - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        self._last_call = time.monotonic()
+
+    def on_success(self) -> None:
+        self._streak += 1
+        if self.interval and self._streak >= self.recover_after:
+            self._streak = 0
+            self.interval /= 2
+            if self.interval < self.base_interval / 4:
+                self.interval = 0.0
+
+    def on_throttled(self, retry_after: float | None = None) -> None:
+        self._streak = 0
+        interval = max(self.interval * 2, self.base_interval, retry_after or 0.0)
+        self.interval = min(interval, self.max_interval)
+
+    def call(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Call fn under the limiter, retrying throttled requests."""
+        for attempt in range(self.max_retries + 1):
+            self.acquire()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                if getattr(e, "status", None) not in RETRYABLE_STATUSES or attempt == self.max_retries:
+                    raise
+                self.on_throttled(_retry_after(e))
+                continue
+            self.on_success()
+            return result
+
+
+def _retry_after(error: Exception) -> float | None:
+    """Read Retry-After seconds from an API error, if present."""
+    headers = getattr(error, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
 # =============================================================================
 # PAGE OPERATIONS
 # =============================================================================
@@ -315,42 +399,95 @@ def normalize_text_for_diff(text: str) -> str:
     return "\n".join(out)
 
 
-def _collect_text_nodes(value: Any) -> list[str]:
-    """Collect plain text from Notion structures."""
+def sha1_normalized(fragments: Iterable[str]) -> str:
+    """
+    SHA1 of ``normalize_text_for_diff("".join(fragments))`` in a single pass.
+
+    Lines are normalized as they complete and fed straight into the hash,
+    so the joined and normalized texts are never materialized.
+    """
+    h = hashlib.sha1()
+    pending = ""      # Partial line carried across fragments
+    blank_run = 0     # Blank lines seen since the last non-blank line
+    started = False   # Whether any line has been written to the hash
+
+    def emit(line: str) -> None:
+        nonlocal blank_run, started
+        line = line.rstrip()
+        if not line:
+            blank_run += 1
+            return
+        out = "\n" * min(blank_run, 2)
+        if started:
+            out = "\n" + out
+        h.update((out + line).encode("utf-8", errors="ignore"))
+        blank_run = 0
+        started = True
+
+    for frag in fragments:
+        if not frag:
+            continue
+        buf = pending + frag
+        # Hold back a trailing CR in case the next fragment starts with LF
+        if buf[-1] == "\r":
+            pending = buf
+            continue
+        lines = buf.replace("\r\n", "\n").replace("\r", "\n").split("\n")
+        pending = lines.pop()
+        for ln in lines:
+            emit(ln)
+
+    for ln in pending.replace("\r\n", "\n").replace("\r", "\n").split("\n"):
+        emit(ln)
+    return h.hexdigest()
+
+
+def _iter_text_nodes(value: Any) -> Iterator[str]:
+    """Yield plain text from Notion structures."""
     if value is None:
-        return []
+        return
     if isinstance(value, str):
-        return [value]
-    if isinstance(value, dict):
+        yield value
+    elif isinstance(value, dict):
         if "plain_text" in value and isinstance(value["plain_text"], str):
-            return [value["plain_text"]]
+            yield value["plain_text"]
+            return
         if "text" in value and isinstance(value["text"], dict):
             content = value["text"].get("content")
             if isinstance(content, str):
-                return [content]
-        out = []
+                yield content
+                return
         for k, v in value.items():
             if k in {"rich_text", "caption"} and isinstance(v, list):
                 for it in v:
-                    out.extend(_collect_text_nodes(it))
+                    yield from _iter_text_nodes(it)
             else:
-                out.extend(_collect_text_nodes(v))
-        return out
-    if isinstance(value, list):
-        out = []
+                yield from _iter_text_nodes(v)
+    elif isinstance(value, list):
         for it in value:
-            out.extend(_collect_text_nodes(it))
-        return out
-    return []
+            yield from _iter_text_nodes(it)
+
+
+def _collect_text_nodes(value: Any) -> list[str]:
+    """Collect plain text from Notion structures."""
+    return list(_iter_text_nodes(value))
+
+
+def _iter_blocks_text(blocks: list[dict]) -> Iterator[str]:
+    """Yield the text fragments of ``blocks_plain_text`` without joining."""
+    for b in blocks:
+        yield from _iter_text_nodes(b)
+        yield "\n"
 
 
 def blocks_plain_text(blocks: list[dict]) -> str:
     """Extract plain text from blocks for diff comparison."""
-    parts = []
-    for b in blocks:
-        parts.extend(_collect_text_nodes(b))
-        parts.append("\n")
-    return "".join(parts)
+    return "".join(_iter_blocks_text(blocks))
+
+
+def hash_blocks_normalized(blocks: list[dict]) -> str:
+    """Diff hash of blocks; same value as sha1_text(normalize_text_for_diff(blocks_plain_text(blocks)))."""
+    return sha1_normalized(_iter_blocks_text(blocks))
 
 
 def rich_text_plain(prop: dict) -> str:
@@ -9,16 +9,24 @@ Usage:
     python -m lib.tools.analyze_translation_cost --test-file path/to/file.md
 """
 
+import hashlib
+import json
+import os
+import sqlite3
 import sys
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from fractions import Fraction
+from functools import partial
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 # Add lib to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from lib.translators.claude import split_into_chunks, extract_speakers
 from lib.translators.prompts import build_story_prompt_full
+from lib.utils.config import CLAUDE_API_KEY, REPO_ROOT
 
 
 # Claude Model Pricing (as of 2024-12, per million tokens)
@@ -35,11 +43,27 @@ DEFAULT_MODEL = 'claude-sonnet-4-20250514'
 INPUT_COST_PER_1M = PRICING[DEFAULT_MODEL]['input']
 OUTPUT_COST_PER_1M = PRICING[DEFAULT_MODEL]['output']
 
+# Prompt caching (as multiples of the base input price): the shared prompt is
+# written to the cache by the first chunk and read back by every later chunk.
+# Prefixes shorter than the minimum are not cached and bill at full price.
+CACHE_WRITE_RATIO = 1.25
+CACHE_READ_RATIO = 0.1
+MIN_CACHEABLE_TOKENS = 1024
+
+# Exact input token counts from the Anthropic counting API, cached by content
+# hash; per-file analyses are cached in the same database by (path, mtime, size)
+TOKEN_CACHE_PATH = Path(REPO_ROOT) / ".cache" / "token_counts.sqlite"
+
 # Token estimation (rough)
 # 1 token ≈ 4 characters for English, ≈ 2-3 characters for Chinese
 EN_CHARS_PER_TOKEN = 4
 CN_CHARS_PER_TOKEN = 2.5
 
+# Ratios as exact fractions so per-chunk sums use integer floor division:
+# n // (p/q) == n * q // p, identical to int(n / ratio) for n >= 0
+_EN_RATIO = Fraction(EN_CHARS_PER_TOKEN)
+_CN_RATIO = Fraction(CN_CHARS_PER_TOKEN)
+
 
 def estimate_tokens(text: str, is_chinese: bool = False) -> int:
     """
@@ -56,17 +80,138 @@ def estimate_tokens(text: str, is_chinese: bool = False) -> int:
     return int(len(text) / chars_per_token)
 
 
-def analyze_file_cost(file_path: Path, chunk_size: int = 500) -> Dict:
+_token_client = None
+_token_db = None
+
+
+def _get_token_client():
+    """Lazily create the Anthropic client used for token counting (None without a key)."""
+    global _token_client
+    if _token_client is None and CLAUDE_API_KEY:
+        import anthropic
+        _token_client = anthropic.Anthropic(api_key=CLAUDE_API_KEY)
+    return _token_client
+
+
+def _get_token_db() -> sqlite3.Connection:
+    """Open the token-count cache (SQLite, safe across worker processes)."""
+    global _token_db
+    if _token_db is None:
+        TOKEN_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _token_db = sqlite3.connect(TOKEN_CACHE_PATH, timeout=30, isolation_level=None)
+        _token_db.execute("CREATE TABLE IF NOT EXISTS tokens (key TEXT PRIMARY KEY, count INTEGER)")
+        _token_db.execute("CREATE TABLE IF NOT EXISTS analyses (key TEXT PRIMARY KEY, result TEXT)")
+    return _token_db
+
+
+def _api_token_count(text: str, model: str = DEFAULT_MODEL) -> Optional[int]:
+    """
+    Exact input token count from the Anthropic counting API.
+    
+    Counts are cached on disk by (model, content) hash, so re-analyzing
+    unchanged text costs no API calls. Returns None when no API key is
+    configured or the request fails.
+    """
+    if not text:
+        return 0
+    client = _get_token_client()
+    if client is None:
+        return None
+    
+    key = hashlib.blake2b(f"{model}\0{text}".encode('utf-8'), digest_size=20).hexdigest()
+    db = _get_token_db()
+    row = db.execute("SELECT count FROM tokens WHERE key = ?", (key,)).fetchone()
+    if row:
+        return row[0]
+    
+    try:
+        result = client.messages.count_tokens(
+            model=model,
+            messages=[{"role": "user", "content": text}],
+        )
+    except Exception:
+        return None
+    db.execute("INSERT OR REPLACE INTO tokens VALUES (?, ?)", (key, result.input_tokens))
+    return result.input_tokens
+
+
+def count_tokens(text: str, model: str = DEFAULT_MODEL) -> int:
+    """
+    Count input tokens with the Anthropic counting API (cached on disk).
+    
+    Falls back to estimate_tokens when no API key is configured or the
+    request fails.
+    """
+    count = _api_token_count(text, model)
+    return count if count is not None else estimate_tokens(text)
+
+
+def chunk_token_sums(chunks: List[str]) -> Tuple[int, int]:
+    """
+    Estimate (input, output) tokens summed over chunks.
+    
+    Same per-chunk truncation as estimate_tokens, but chunk lengths are
+    gathered once and reduced with integer arithmetic only.
+    """
+    lengths = list(map(len, chunks))
+    en_num, en_den = _EN_RATIO.numerator, _EN_RATIO.denominator
+    cn_num, cn_den = _CN_RATIO.numerator, _CN_RATIO.denominator
+    input_tokens = sum(n * en_den // en_num for n in lengths)
+    output_tokens = sum(n * cn_den // cn_num for n in lengths)
+    return input_tokens, output_tokens
+
+
+def input_cost_usd(prompt_tokens: int, content_tokens: int, n_chunks: int) -> float:
+    """
+    Input cost of sending the prompt with every chunk, with prompt caching.
+    
+    The first chunk pays the cache write on the prompt, later chunks pay the
+    cache-read rate; chunk content always bills at the base input price.
+    """
+    if n_chunks and prompt_tokens >= MIN_CACHEABLE_TOKENS:
+        prompt_units = prompt_tokens * (CACHE_WRITE_RATIO + CACHE_READ_RATIO * (n_chunks - 1))
+    else:
+        prompt_units = prompt_tokens * n_chunks
+    return ((prompt_units + content_tokens) / 1_000_000) * INPUT_COST_PER_1M
+
+
+def _analysis_key(file_path: Path, chunk_size: int, count_api: bool) -> str:
+    """Cache key for a file analysis; any edit changes mtime or size."""
+    st = file_path.stat()
+    return json.dumps([str(file_path.resolve()), st.st_mtime_ns, st.st_size, chunk_size, count_api])
+
+
+def analyze_file_cost(
+    file_path: Path,
+    chunk_size: int = 500,
+    count_api: bool = True,
+    use_cache: bool = True,
+) -> Dict:
     """
     Analyze translation cost for a single file.
     
+    Input tokens come from count_tokens (exact when an API key is set);
+    output tokens are always estimated since the translation does not exist yet.
+    Results are cached on disk, so re-runs skip unchanged files. With
+    count_api, a result where any count fell back to the heuristic is not
+    cached, so a later run with a working API counts it exactly.
+    
     Args:
         file_path: Path to markdown file
         chunk_size: Chunk size setting
+        count_api: Count input tokens via the API (False = heuristic only)
+        use_cache: Reuse a cached result (False = recompute and overwrite it)
     
     Returns:
         Dict with cost analysis
     """
+    key = _analysis_key(file_path, chunk_size, count_api)
+    db = _get_token_db()
+    if use_cache:
+        row = db.execute("SELECT result FROM analyses WHERE key = ?", (key,)).fetchone()
+        if row:
+            return json.loads(row[0])
+    
     content = file_path.read_text(encoding='utf-8')
     lines = content.split('\n')
     
@@ -79,27 +224,26 @@ def analyze_file_cost(file_path: Path, chunk_size: int = 500) -> Dict:
     # Split into chunks
     chunks = split_into_chunks(content, chunk_size)
     
-    # Calculate tokens
+    # Input: prompt (constant per chunk) + chunk content
+    # Output: assume same length as input (conservative estimate)
+    chunk_input_tokens, total_output_tokens = chunk_token_sums(chunks)
     prompt_tokens = estimate_tokens(prompt)
-    
-    total_input_tokens = 0
-    total_output_tokens = 0
-    
-    for chunk in chunks:
-        # Input: prompt + chunk content
-        chunk_input_tokens = prompt_tokens + estimate_tokens(chunk)
-        # Output: assume same length as input (conservative estimate)
-        chunk_output_tokens = estimate_tokens(chunk, is_chinese=True)
-        
-        total_input_tokens += chunk_input_tokens
-        total_output_tokens += chunk_output_tokens
+    exact = True
+    if count_api:
+        texts = [prompt] + chunks
+        counts = [_api_token_count(t) for t in texts]
+        exact = None not in counts
+        counts = [c if c is not None else estimate_tokens(t) for c, t in zip(counts, texts)]
+        prompt_tokens = counts[0]
+        chunk_input_tokens = sum(counts[1:])
+    total_input_tokens = prompt_tokens * len(chunks) + chunk_input_tokens
     
     # Calculate costs
-    input_cost = (total_input_tokens / 1_000_000) * INPUT_COST_PER_1M
+    input_cost = input_cost_usd(prompt_tokens, chunk_input_tokens, len(chunks))
     output_cost = (total_output_tokens / 1_000_000) * OUTPUT_COST_PER_1M
     total_cost = input_cost + output_cost
     
-    return {
+    analysis = {
         'file': file_path.name,
         'lines': len(lines),
         'chars': len(content),
@@ -113,6 +257,9 @@ def analyze_file_cost(file_path: Path, chunk_size: int = 500) -> Dict:
         'output_cost_usd': output_cost,
         'total_cost_usd': total_cost,
     }
+    if exact:
+        db.execute("INSERT OR REPLACE INTO analyses VALUES (?, ?)", (key, json.dumps(analysis)))
+    return analysis
 
 
 def categorize_by_size(lines: int) -> str:
@@ -125,13 +272,40 @@ def categorize_by_size(lines: int) -> str:
         return "大型"
 
 
-def analyze_story_directory(story_dir: Path, chunk_size: int = 500) -> Dict:
+# Numeric result fields summed into directory and category totals
+SUM_FIELDS = (
+    'lines', 'chars', 'chunks',
+    'input_tokens', 'output_tokens', 'total_tokens',
+    'input_cost_usd', 'output_cost_usd', 'total_cost_usd',
+)
+
+
+def sum_fields(results: List[Dict]) -> Dict:
+    """Sum SUM_FIELDS over analyses in one pass per column."""
+    totals = {'files': len(results)}
+    for field in SUM_FIELDS:
+        totals[field] = sum(r[field] for r in results)
+    return totals
+
+
+def analyze_story_directory(
+    story_dir: Path,
+    chunk_size: int = 500,
+    max_workers: int = None,
+    count_api: bool = True,
+    use_cache: bool = True,
+) -> Dict:
     """
     Analyze all story files in a directory.
     
+    Files are analyzed in parallel worker processes; results keep file order.
+    
     Args:
         story_dir: Directory containing story markdown files
         chunk_size: Chunk size setting
+        max_workers: Worker processes (default: CPU count, 1 = serial)
+        count_api: Count input tokens via the API (False = heuristic only)
+        use_cache: Reuse cached per-file results (False = recompute all)
     
     Returns:
         Analysis summary
@@ -141,44 +315,28 @@ def analyze_story_directory(story_dir: Path, chunk_size: int = 500) -> Dict:
     if not md_files:
         return {'error': 'No markdown files found'}
     
-    results = []
-    totals = {
-        'files': 0,
-        'lines': 0,
-        'chars': 0,
-        'chunks': 0,
-        'input_tokens': 0,
-        'output_tokens': 0,
-        'total_tokens': 0,
-        'total_cost_usd': 0.0,
-    }
-    
-    categories = {'小型': [], '中型': [], '大型': []}
-    
     print(f"Analyzing {len(md_files)} files from {story_dir.name}...\n")
     
-    for md_file in md_files:
-        analysis = analyze_file_cost(md_file, chunk_size)
-        results.append(analysis)
-        
-        # Update totals
-        totals['files'] += 1
-        totals['lines'] += analysis['lines']
-        totals['chars'] += analysis['chars']
-        totals['chunks'] += analysis['chunks']
-        totals['input_tokens'] += analysis['input_tokens']
-        totals['output_tokens'] += analysis['output_tokens']
-        totals['total_tokens'] += analysis['total_tokens']
-        totals['total_cost_usd'] += analysis['total_cost_usd']
-        
-        # Categorize
-        category = categorize_by_size(analysis['lines'])
-        categories[category].append(analysis)
+    workers = min(max_workers or os.cpu_count() or 1, len(md_files))
+    analyze = partial(
+        analyze_file_cost, chunk_size=chunk_size, count_api=count_api, use_cache=use_cache
+    )
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            analyses = list(executor.map(analyze, md_files, chunksize=8))
+    else:
+        analyses = [analyze(md_file) for md_file in md_files]
+    
+    # Reduce once after the map instead of incrementing totals per file
+    categories = {'小型': [], '中型': [], '大型': []}
+    for analysis in analyses:
+        categories[categorize_by_size(analysis['lines'])].append(analysis)
     
     return {
-        'results': results,
-        'totals': totals,
+        'results': analyses,
+        'totals': sum_fields(analyses),
         'categories': categories,
+        'category_totals': {name: sum_fields(files) for name, files in categories.items()},
     }
 
 
@@ -186,6 +344,7 @@ def print_analysis(analysis: Dict) -> None:
     """Print formatted cost analysis."""
     totals = analysis['totals']
     categories = analysis['categories']
+    category_totals = analysis['category_totals']
     
     print("="*70)
     print(" 翻译成本分析")
@@ -207,11 +366,9 @@ def print_analysis(analysis: Dict) -> None:
     print()
     
     # Cost breakdown
-    print("美元花费 (Claude Sonnet 4):")
-    input_cost = (totals['input_tokens'] / 1_000_000) * INPUT_COST_PER_1M
-    output_cost = (totals['output_tokens'] / 1_000_000) * OUTPUT_COST_PER_1M
-    print(f"  输入成本:  ${input_cost:.4f}")
-    print(f"  输出成本:  ${output_cost:.4f}")
+    print("美元花费 (Claude Sonnet 4, 含 Prompt 缓存):")
+    print(f"  输入成本:  ${totals['input_cost_usd']:.4f}")
+    print(f"  输出成本:  ${totals['output_cost_usd']:.4f}")
     print(f"  总成本:    ${totals['total_cost_usd']:.4f}")
     print()
     
@@ -226,9 +383,10 @@ def print_analysis(analysis: Dict) -> None:
         if not cat_files:
             continue
         
-        cat_total_cost = sum(f['total_cost_usd'] for f in cat_files)
-        cat_avg_cost = cat_total_cost / len(cat_files) if cat_files else 0
-        cat_avg_lines = sum(f['lines'] for f in cat_files) / len(cat_files) if cat_files else 0
+        cat_totals = category_totals[cat_name]
+        cat_total_cost = cat_totals['total_cost_usd']
+        cat_avg_cost = cat_total_cost / len(cat_files)
+        cat_avg_lines = cat_totals['lines'] / len(cat_files)
         
         print(f"{cat_name}文件 ({len(cat_files)}个):")
         print(f"  平均行数: {cat_avg_lines:.0f}")
@@ -269,6 +427,22 @@ def main():
         default=500,
         help="Chunk size (default: 500)"
     )
+    parser.add_argument(
+        "--estimate-only",
+        action="store_true",
+        help="Use the chars-per-token heuristic instead of the token counting API"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for --test-dir (default: CPU count)"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore cached per-file results and recompute them"
+    )
     
     args = parser.parse_args()
     
@@ -279,7 +453,9 @@ def main():
             print(f"Error: File not found: {file_path}")
             sys.exit(1)
         
-        analysis = analyze_file_cost(file_path, args.chunk_size)
+        analysis = analyze_file_cost(
+            file_path, args.chunk_size, not args.estimate_only, use_cache=not args.no_cache
+        )
         
         print("="*70)
         print(f" 文件: {analysis['file']}")
@@ -304,7 +480,10 @@ def main():
             print(f"Error: Directory not found: {dir_path}")
             sys.exit(1)
         
-        analysis = analyze_story_directory(dir_path, args.chunk_size)
+        analysis = analyze_story_directory(
+            dir_path, args.chunk_size, args.workers,
+            count_api=not args.estimate_only, use_cache=not args.no_cache,
+        )
         if 'error' in analysis:
             print(f"Error: {analysis['error']}")
             sys.exit(1)
@@ -12,17 +12,24 @@ Usage:
     python -m lib.tools.find_character_stories "缇可"
     python -m lib.tools.find_character_stories "Tikoh"
     python -m lib.tools.find_character_stories "缇可" --extract characters/tikoh
+    python -m lib.tools.find_character_stories "缇可" --rebuild-index
 
 Output:
     Lists all activities (folder names) containing the character.
 """
 
+import csv
+import mmap
 import os
+import re
+import sqlite3
 import sys
 import argparse
 import shutil
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Dict, Set, Optional
+from typing import Iterator, List, Dict, Set, Optional, Tuple
 from collections import defaultdict
 
 # Add lib to path
@@ -31,40 +38,43 @@ sys.path.insert(0, str(LIB_DIR.parent))
 
 from lib.utils.config import LOCAL_BLHXFY_SCENARIO, LOCAL_BLHXFY_ETC
 
+# Scenario categories searched (story-related only)
+ALLOWED_CATEGORIES = frozenset({'活动剧情', 'SIDE-STORY', 'SIDE_STORY', '主线剧情', '支线剧情', '新手教程'})
 
+# Persisted full-text index of the scenario tree (see build_scenario_index)
+INDEX_FILENAME = '.index.sqlite'
+
+# CJK Unified Ideographs (used to detect names that are already Chinese)
+_CJK_RE = re.compile(r'[\u4e00-\u9fff]')
+
+
+def _read_name_csv(csv_path: Path, lowercase: bool) -> Dict[str, str]:
+    """Read a name,trans,... mapping CSV (header skipped) into a dict."""
+    if not csv_path.exists():
+        return {}
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        reader = csv.reader(f)
+        next(reader, None)
+        pairs = ((row[0].strip(), row[1].strip()) for row in reader if len(row) >= 2)
+        if lowercase:
+            return {k.lower(): v for k, v in pairs if k and v}
+        return {k: v for k, v in pairs if k and v}
+
+
+@lru_cache(maxsize=1)
 def load_name_mappings() -> Dict[str, str]:
-    """Load EN->CN and JP->CN name mappings from CSV files."""
-    mappings = {}
-    
-    # Load EN->CN mappings
-    en_csv = Path(LOCAL_BLHXFY_ETC) / "npc-name-en.csv"
-    if en_csv.exists():
-        with open(en_csv, 'r', encoding='utf-8') as f:
-            for line in f:
-                parts = line.strip().split(',')
-                if len(parts) >= 2 and parts[0] and parts[1]:
-                    # EN name -> CN name
-                    mappings[parts[0].strip().lower()] = parts[1].strip()
-    
-    # Load added EN mappings
-    added_csv = Path(LOCAL_BLHXFY_ETC) / "added_en_mapping.csv"
-    if added_csv.exists():
-        with open(added_csv, 'r', encoding='utf-8') as f:
-            for line in f:
-                parts = line.strip().split(',')
-                if len(parts) >= 2 and parts[0] and parts[1]:
-                    mappings[parts[0].strip().lower()] = parts[1].strip()
-    
-    # Load JP->CN mappings
-    jp_csv = Path(LOCAL_BLHXFY_ETC) / "npc-name-jp.csv"
-    if jp_csv.exists():
-        with open(jp_csv, 'r', encoding='utf-8') as f:
-            for line in f:
-                parts = line.strip().split(',')
-                if len(parts) >= 2 and parts[0] and parts[1]:
-                    # JP name -> CN name
-                    mappings[parts[0].strip()] = parts[1].strip()
+    """
+    Load EN->CN and JP->CN name mappings from CSV files.
     
+    Parsed once per process; the returned dict is shared, do not mutate it.
+    """
+    etc = Path(LOCAL_BLHXFY_ETC)
+    mappings = {}
+    # EN names are keyed lowercase; added mappings override the official ones
+    mappings.update(_read_name_csv(etc / "npc-name-en.csv", lowercase=True))
+    mappings.update(_read_name_csv(etc / "added_en_mapping.csv", lowercase=True))
+    # JP names keep their original form
+    mappings.update(_read_name_csv(etc / "npc-name-jp.csv", lowercase=False))
     return mappings
 
 
@@ -76,7 +86,7 @@ def resolve_name(name: str, mappings: Dict[str, str]) -> List[str]:
     results = [name]  # Always include original
     
     # Check if it's already Chinese (contains Chinese characters)
-    if any('\u4e00' <= c <= '\u9fff' for c in name):
+    if _CJK_RE.search(name):
         return results
     
     # Try to find CN mapping
@@ -91,13 +101,199 @@ def resolve_name(name: str, mappings: Dict[str, str]) -> List[str]:
     return list(set(results))
 
 
-def search_scenarios(search_names: List[str], scenario_dir: str) -> Dict[str, List[str]]:
+def compile_name_pattern(names: List[str]) -> Optional["re.Pattern[bytes]"]:
+    """
+    Compile names into one UTF-8 bytes alternation, or None if no names.
+    
+    Names are deduplicated and ordered longest-first so match.group()
+    reports the most specific name at a given position.
+    """
+    unique = sorted({n for n in names if n}, key=len, reverse=True)
+    if not unique:
+        return None
+    return re.compile(b'|'.join(re.escape(n.encode('utf-8')) for n in unique))
+
+
+def _file_contains(file_path: str, pattern: "re.Pattern[bytes]") -> bool:
+    """Search a file's raw bytes via mmap; stops reading at the first hit."""
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return False
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return pattern.search(mm) is not None
+
+
+def _accept_scenario_parts(parts: Tuple[str, ...]) -> bool:
+    """Whether a scenario-relative path is in a searched category."""
+    if len(parts) < 2:
+        return False
+    category = parts[0]
+    # Skip character fate episodes (角色剧情)
+    if '角色剧情' in category:
+        return False
+    return category in ALLOWED_CATEGORIES
+
+
+def _skip_scenario_dir(rel: Tuple[str, ...]) -> bool:
+    """
+    Whether a scenario subdirectory can be pruned without descending.
+    
+    Only top-level categories are pruned, by the same rules as
+    _accept_scenario_parts; deeper directories are always walked.
+    """
+    if len(rel) != 1:
+        return False
+    category = rel[0]
+    # Character fate episodes (角色剧情) are never searched
+    if '角色剧情' in category:
+        return True
+    return category not in ALLOWED_CATEGORIES
+
+
+def _walk_csv(root: str, rel: Tuple[str, ...] = ()) -> Iterator[Tuple[Tuple[str, ...], str]]:
+    """
+    Yield (relative parts, full path) for every searchable CSV under root.
+    
+    Uses os.scandir so file/dir checks come from the directory entries
+    instead of extra stat calls; hidden entries are skipped and excluded
+    subtrees are pruned before they are listed.
+    """
+    try:
+        with os.scandir(root) as it:
+            entries = list(it)
+    except OSError:
+        return
+    for entry in entries:
+        if entry.name.startswith('.'):
+            continue
+        if entry.is_dir(follow_symlinks=False):
+            sub = rel + (entry.name,)
+            if not _skip_scenario_dir(sub):
+                yield from _walk_csv(entry.path, sub)
+        elif entry.name.endswith('.csv') and entry.is_file():
+            yield rel + (entry.name,), entry.path
+
+
+def _scenario_candidates(scenario_path: Path) -> List[Tuple[str, Tuple[str, ...]]]:
+    """List searchable CSV files (full path, scenario-relative parts)."""
+    return [
+        (full_path, parts)
+        for parts, full_path in _walk_csv(str(scenario_path))
+        if _accept_scenario_parts(parts)
+    ]
+
+
+def _activity_of(parts: Tuple[str, ...]) -> Tuple[str, str]:
+    """Map scenario-relative path parts to (activity_key, file name)."""
+    # activity is everything between category and the filename
+    if len(parts) > 2:
+        activity = '/'.join(parts[1:-1])
+    else:
+        activity = parts[0]
+    return f"{parts[0]}/{activity}", parts[-1]
+
+
+def build_scenario_index(scenario_dir: str) -> int:
+    """
+    (Re)build the persisted full-text index of searchable scenario CSVs.
+    
+    Stored as SQLite FTS5 (trigram tokenizer) in scenario_dir/.index.sqlite,
+    with each file's mtime/size so stale indexes are detected at query time.
+    
+    Returns:
+        Number of indexed files
+    """
+    scenario_path = Path(scenario_dir)
+    index_path = scenario_path / INDEX_FILENAME
+    tmp_path = index_path.with_suffix('.tmp')
+    tmp_path.unlink(missing_ok=True)
+    
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("CREATE TABLE files (path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER)")
+        conn.execute("CREATE VIRTUAL TABLE scenarios USING fts5(path UNINDEXED, content, tokenize='trigram')")
+        count = 0
+        for file_path, parts in _scenario_candidates(scenario_path):
+            try:
+                st = os.stat(file_path)
+                with open(file_path, 'rb') as f:
+                    content = f.read().decode('utf-8', errors='replace')
+            except OSError:
+                continue
+            rel = '/'.join(parts)
+            conn.execute("INSERT INTO files VALUES (?, ?, ?)", (rel, st.st_mtime_ns, st.st_size))
+            conn.execute("INSERT INTO scenarios VALUES (?, ?)", (rel, content))
+            count += 1
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, index_path)
+    return count
+
+
+def _glob_escape(text: str) -> str:
+    """Escape SQLite GLOB metacharacters."""
+    return re.sub(r'([*?\[])', r'[\1]', text)
+
+
+def _query_scenario_index(
+    scenario_path: Path,
+    candidates: List[Tuple[str, Tuple[str, ...]]],
+    search_names: List[str],
+) -> Optional[Set[str]]:
+    """
+    Look up files containing any name in the persisted index.
+    
+    Returns:
+        Set of matching relative paths, or None if the index is missing or stale
+    """
+    index_path = scenario_path / INDEX_FILENAME
+    if not index_path.exists():
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+    except sqlite3.Error:
+        return None
+    try:
+        indexed = {path: (mtime, size) for path, mtime, size in conn.execute("SELECT * FROM files")}
+        if len(indexed) != len(candidates):
+            return None
+        for file_path, parts in candidates:
+            st = os.stat(file_path)
+            if indexed.get('/'.join(parts)) != (st.st_mtime_ns, st.st_size):
+                return None
+        
+        hits = set()
+        for name in {n for n in search_names if n}:
+            if len(name) >= 3:
+                # Trigram index lookup
+                rows = conn.execute("SELECT path FROM scenarios WHERE content GLOB ?", (f"*{_glob_escape(name)}*",))
+            else:
+                # Trigrams cannot match shorter substrings; scan indexed text
+                rows = conn.execute("SELECT path FROM scenarios WHERE instr(content, ?) > 0", (name,))
+            hits.update(path for (path,) in rows)
+        return hits
+    except (sqlite3.Error, OSError):
+        return None
+    finally:
+        conn.close()
+
+
+def search_scenarios(
+    search_names: List[str],
+    scenario_dir: str,
+    max_workers: int = 32,
+    use_index: bool = True,
+) -> Dict[str, List[str]]:
     """
     Search scenario files for character mentions.
     
     IMPORTANT: Only searches story-related activities (活动剧情, SIDE-STORY, 主线剧情, 支线剧情).
     Skips character-specific fate episodes (角色剧情/SSR, 角色剧情/SR).
     
+    Uses the persisted index when it is present and up to date; otherwise
+    files are scanned on a thread pool (the work is I/O bound).
+    
     Returns:
         Dict mapping activity folder name -> list of files containing the character
     """
@@ -106,56 +302,65 @@ def search_scenarios(search_names: List[str], scenario_dir: str) -> Dict[str, Li
     
     if not scenario_path.exists():
         print(f"Warning: Scenario directory not found: {scenario_dir}")
-        return results
-    
-    # Allowed categories (story-related only)
-    allowed_categories = {'活动剧情', 'SIDE-STORY', 'SIDE_STORY', '主线剧情', '支线剧情', '新手教程'}
-    
-    # Search all CSV files recursively
-    for file_path in scenario_path.rglob('*.csv'):
-        if not file_path.is_file():
-            continue
-        
-        # Get category from path
-        rel_to_scenario = file_path.relative_to(scenario_path)
-        parts = rel_to_scenario.parts
-        
-        if len(parts) < 2:
-            continue
-        
-        category = parts[0]
-        
-        # Skip character fate episodes (角色剧情)
-        if '角色剧情' in category or category in ['SSR', 'SR']:
-            continue
-        
-        # Only process allowed categories
-        if category not in allowed_categories:
-            continue
-        
+        return {}
+    
+    # One alternation scans each file once, whatever the number of names.
+    # Matched as UTF-8 bytes so files are never decoded.
+    name_pattern = compile_name_pattern(search_names)
+    if name_pattern is None:
+        return {}
+    
+    candidates = _scenario_candidates(scenario_path)
+    
+    indexed_hits = _query_scenario_index(scenario_path, candidates, search_names) if use_index else None
+    if indexed_hits is not None:
+        for _, parts in candidates:
+            if '/'.join(parts) in indexed_hits:
+                activity_key, file_rel = _activity_of(parts)
+                results[activity_key].append(file_rel)
+        return dict(results)
+    
+    def scan_one(candidate: Tuple[str, Tuple[str, ...]]) -> Optional[Tuple[str, str]]:
+        file_path, parts = candidate
         try:
-            content = file_path.read_text(encoding='utf-8')
-            
             # Check if any search name is in the content
-            for name in search_names:
-                if name in content:
-                    # activity is everything between category and the filename
-                    if len(parts) > 2:
-                        activity = '/'.join(parts[1:-1])
-                    else:
-                        activity = parts[0]
-                    
-                    activity_key = f"{category}/{activity}"
-                    file_rel = parts[-1]
-                    results[activity_key].append(file_rel)
-                    break
-                    
-        except (UnicodeDecodeError, IOError):
-            continue
+            if not _file_contains(file_path, name_pattern):
+                return None
+        except (OSError, ValueError):
+            return None
+        return _activity_of(parts)
+    
+    # Results are merged on the calling thread, in traversal order
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for hit in executor.map(scan_one, candidates):
+            if hit:
+                activity_key, file_rel = hit
+                results[activity_key].append(file_rel)
     
     return dict(results)
 
 
+@lru_cache(maxsize=1)
+def _get_scenario_extractor():
+    """
+    Shared ScenarioExtractor, imported on first use.
+    
+    The import pulls in the translator stack, so plain searches skip it.
+    """
+    from lib.extractors.scenario import ScenarioExtractor
+    return ScenarioExtractor()
+
+
+def _link_or_copy(src: Path, dst: Path) -> None:
+    """Hard-link src to dst (replacing dst); copy when linking is not possible."""
+    dst.unlink(missing_ok=True)
+    try:
+        os.link(src, dst)
+    except OSError:
+        # Cross-device or filesystem without hard links
+        shutil.copy2(src, dst)
+
+
 def extract_activity(
     activity_key: str, 
     scenario_dir: str, 
@@ -169,7 +374,8 @@ def extract_activity(
         activity_key: Activity path like "活动剧情/金月3"
         scenario_dir: Path to scenario directory
         output_dir: Target directory (e.g., characters/tikoh/story)
-        copy_to_story_translated: Also copy to story/translated/
+        copy_to_story_translated: Also copy to story/translated/ (hard-linked
+            when possible, so both paths share one file)
     
     Returns:
         True if extraction succeeded
@@ -179,19 +385,15 @@ def extract_activity(
         print(f"Error: Activity not found: {source}")
         return False
     
-    # Import scenario extractor
-    sys.path.insert(0, str(Path(__file__).parent.parent))
-    from lib.extractors.scenario import ScenarioExtractor
-    
     # Get just the activity name (last part of key)
-    activity_name = Path(activity_key).name
+    activity_name = source.name
     
     # Use ScenarioExtractor to convert CSV to markdown
-    extractor = ScenarioExtractor()
+    extractor = _get_scenario_extractor()
     
     # Extract to character story folder
     char_target = Path(output_dir) / activity_name / "trans"
-    result = extractor.extract(str(source), str(char_target))
+    result = extractor.extract(source, char_target)
     
     if not result.get('success'):
         print(f"Failed to extract {activity_key}: {result.get('error', 'Unknown error')}")
@@ -199,16 +401,19 @@ def extract_activity(
     
     print(f"Extracted to {char_target}")
     
-    # Also copy to story/translated/
+    # Also copy to story/translated/ (hard links to the files just extracted,
+    # so the CSVs are not converted a second time)
     if copy_to_story_translated:
         repo_root = Path(scenario_dir).parent.parent.parent.parent
         story_target = repo_root / "story" / "translated" / activity_name
+        story_target.mkdir(parents=True, exist_ok=True)
         
-        # Extract again to story/translated
-        result2 = extractor.extract(str(source), str(story_target))
+        for csv_file in source.glob("*.csv"):
+            md_file = char_target / f"{csv_file.stem}.md"
+            if md_file.exists():
+                _link_or_copy(md_file, story_target / md_file.name)
         
-        if result2.get('success'):
-            print(f"Also copied to {story_target}")
+        print(f"Also copied to {story_target}")
     
     return True
 
@@ -236,6 +441,16 @@ def main():
         default=LOCAL_BLHXFY_SCENARIO,
         help="Path to scenario directory"
     )
+    parser.add_argument(
+        "--rebuild-index",
+        action="store_true",
+        help=f"Rebuild the persisted search index ({INDEX_FILENAME}) before searching"
+    )
+    parser.add_argument(
+        "--no-index",
+        action="store_true",
+        help="Scan files directly, ignoring the search index"
+    )
     parser.add_argument(
         "-v", "--verbose",
         action="store_true",
@@ -253,9 +468,14 @@ def main():
     search_names = resolve_name(args.name, mappings)
     print(f"Searching for: {', '.join(search_names)}")
     
+    if args.rebuild_index:
+        print(f"\nBuilding index in: {args.scenario_dir}")
+        count = build_scenario_index(args.scenario_dir)
+        print(f"Indexed {count} files")
+    
     # Search scenarios
     print(f"\nSearching in: {args.scenario_dir}")
-    results = search_scenarios(search_names, args.scenario_dir)
+    results = search_scenarios(search_names, args.scenario_dir, use_index=not args.no_index)
     
     if not results:
         print("\nNo matching activities found.")
@@ -17,19 +17,128 @@ import os
 import re
 import csv
 import json
+import mmap
+import sqlite3
+import threading
 import time
+from bisect import bisect_right
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
 from pathlib import Path
 from typing import Dict, Set, Optional, List, Tuple
 
+from lib.utils.concurrency import RateLimiter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from tqdm import tqdm
+    HAS_TQDM = True
+except ImportError:
+    HAS_TQDM = False
+
+
+# Scenario "JP/CN" name pairs, e.g. サルナーン/萨鲁纳恩, matched on raw UTF-8 bytes.
+# Group 1 is a katakana run (ァ-ヶ, ・, ー); group 2 runs to the next ASCII
+# delimiter and is trimmed at full-width punctuation/Unicode space after decoding.
+_NAME_PAIR_RE = re.compile(
+    rb'((?:\xe3\x82[\xa1-\xbf]|\xe3\x83[\x80-\xb6\xbb\xbc])+)/([^\s\x1c-\x1f/,]+)'
+)
+_CN_NAME_RUN_RE = re.compile(r'[^\s/,，。！？\n]+')
+_HAN_RE = re.compile(r'[\u4e00-\u9fff]')
+
+
+def _scan_name_pairs(mm) -> List[Tuple[str, str]]:
+    """
+    Find JP/CN name pairs in a scenario CSV buffer, in file order.
+    
+    Searched as bytes; only matched names are decoded. Results equal
+    findall of the text pattern on the decoded file.
+    """
+    pairs = []
+    pos = 0
+    while True:
+        m = _NAME_PAIR_RE.search(mm, pos)
+        if not m:
+            break
+        cn_run = _CN_NAME_RUN_RE.match(m.group(2).decode('utf-8'))
+        if cn_run is None:
+            pos = m.start(2)
+            continue
+        cn = cn_run.group()
+        pairs.append((m.group(1).decode('utf-8'), cn))
+        pos = m.start(2) + len(cn.encode('utf-8'))
+    return pairs
+
+
+def _scan_csv(csv_file: str) -> Optional[List[Tuple[str, str]]]:
+    """
+    Worker entry point: name pairs of one CSV, or None if it cannot be read.
+    
+    The file is memory-mapped, so it is searched without being read into memory.
+    """
+    try:
+        with open(csv_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return []
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return _scan_name_pairs(mm)
+    except Exception:
+        return None
+
+
+def _save_json(data: dict, path: Path):
+    """
+    Write data as indented JSON, atomically (temp file + rename).
+    
+    Uses orjson when installed; the output matches json.dump(indent=2).
+    """
+    tmp = path.with_name(path.name + ".tmp")
+    if orjson is not None:
+        tmp.write_bytes(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    else:
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
 
 class JPToENConverter:
     """Convert JP->CN mappings to EN->CN mappings."""
     
+    # Event/seasonal variant suffixes accepted on valid CN names
+    CN_NAME_SUFFIXES = ('（活动）', '（夏日）', '（圣诞）', '（万圣）', '（情人节）')
+    
+    # Names looked up and saved per progress step
+    BATCH_SIZE = 50
+    
+    # Seconds between Google Translate requests outside convert_all
+    REQUEST_DELAY = 0.3
+    
+    # convert_all logs one status line per this many names (failures always)
+    LOG_EVERY = 100
+    
+    # JP -> EN translations already fetched, reused across runs
+    TRANSLATE_CACHE_FILE = Path(__file__).parent / "translate_cache.sqlite"
+    
     def __init__(self):
         self.jp_to_cn: Dict[str, str] = {}
         self.en_to_cn: Dict[str, str] = {}
+        self._en_lower: Set[str] = set()  # lowercased en_to_cn keys
         self.valid_cn_names: Set[str] = set()
+        self._valid_cn_with_suffix: Set[str] = set()  # valid names plus variant suffixes
         self.scenario_cn_cache: Dict[str, str] = {}  # JP -> CN from scenarios
+        # Substring index over scenario_cn_cache keys (see _index_scenario_cache)
+        self._scenario_order: Dict[str, int] = {}
+        self._scenario_keys: List[str] = []
+        self._scenario_starts: List[int] = []
+        self._scenario_blob = ""
+        self._scenario_max_len = 0
+        self._local = threading.local()  # per-thread googletrans.Translator
+        self._limiter = RateLimiter(1.0 / self.REQUEST_DELAY)
+        self._cache_db: Optional[sqlite3.Connection] = None
         self._load_data()
         self._build_scenario_cache()
     
@@ -56,6 +165,7 @@ class JPToENConverter:
                     if row.get('name') and row.get('trans'):
                         self.en_to_cn[row['name']] = row['trans']
             print(f"Loaded {len(self.en_to_cn)} existing EN->CN mappings")
+        self._en_lower = {k.lower() for k in self.en_to_cn}
         
         # Load valid CN character names
         cn_file = Path(__file__).parent.parent / "local_data" / "cn_character_names.txt"
@@ -66,47 +176,156 @@ class JPToENConverter:
                 if line and not line.startswith('#'):
                     self.valid_cn_names.add(line)
             print(f"Loaded {len(self.valid_cn_names)} valid CN names")
+        
+        # Also accept event/seasonal variants of valid names
+        self._valid_cn_with_suffix = set(self.valid_cn_names)
+        self._valid_cn_with_suffix.update(
+            name + suffix for name in self.valid_cn_names for suffix in self.CN_NAME_SUFFIXES
+        )
     
-    def _build_scenario_cache(self):
-        """Build cache of JP->CN from scenario CSV files by searching for JP/CN patterns."""
+    def _build_scenario_cache(self, max_workers: Optional[int] = None):
+        """
+        Build cache of JP->CN from scenario CSV files by searching for JP/CN patterns.
+        
+        Files are scanned in parallel worker processes; results are merged
+        in walk order, so the first occurrence of a JP name still wins.
+        """
         scenario_dirs = [
             Path(__file__).parent.parent / "local_data" / "blhxfy" / "scenario",
         ]
         
-        # Pattern: Japanese name followed by / and Chinese name
-        # e.g., サルナーン/萨鲁纳恩 or ヴィカラ/碧卡拉
-        pattern = re.compile(r'([ァ-ヶー・]+)/([^\s/,，。！？\n]+)')
+        csv_files = []
+        for base_dir in scenario_dirs:
+            if base_dir.exists():
+                csv_files.extend(str(p) for p in base_dir.rglob("*.csv"))
+        
+        workers = min(max_workers or os.cpu_count() or 1, len(csv_files))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                scanned = list(executor.map(_scan_csv, csv_files, chunksize=16))
+        else:
+            scanned = [_scan_csv(f) for f in csv_files]
+        scanned = [result for result in scanned if result is not None]
         
         csv_count = 0
-        for base_dir in scenario_dirs:
-            if not base_dir.exists():
-                continue
-            
-            for csv_file in base_dir.rglob("*.csv"):
-                try:
-                    with open(csv_file, 'r', encoding='utf-8-sig') as f:
-                        content = f.read()
-                        matches = pattern.findall(content)
-                        for jp, cn in matches:
-                            # Validate: CN should contain Chinese characters
-                            if re.search(r'[\u4e00-\u9fff]', cn) and len(cn) >= 2:
-                                if jp not in self.scenario_cn_cache:
-                                    self.scenario_cn_cache[jp] = cn
-                    csv_count += 1
-                except Exception:
-                    continue
+        for pairs in scanned:
+            # Japanese name followed by / and Chinese name
+            # e.g., サルナーン/萨鲁纳恩 or ヴィカラ/碧卡拉
+            for jp, cn in pairs:
+                # Validate: CN should contain Chinese characters
+                if len(cn) >= 2 and _HAN_RE.search(cn):
+                    if jp not in self.scenario_cn_cache:
+                        self.scenario_cn_cache[jp] = cn
+            csv_count += 1
         
+        self._index_scenario_cache()
         print(f"Scanned {csv_count} scenario CSVs, found {len(self.scenario_cn_cache)} JP/CN patterns")
     
+    def _index_scenario_cache(self):
+        """
+        Index scenario_cn_cache keys for substring lookups.
+        
+        Keys are joined in insertion order into one newline-separated blob,
+        so the first str.find hit is the earliest key containing a name;
+        _scenario_starts maps the hit offset back to its key.
+        """
+        self._scenario_keys = list(self.scenario_cn_cache)
+        self._scenario_order = {jp: i for i, jp in enumerate(self._scenario_keys)}
+        self._scenario_starts = []
+        offset = 0
+        for jp in self._scenario_keys:
+            self._scenario_starts.append(offset)
+            offset += len(jp) + 1
+        self._scenario_blob = "\n".join(self._scenario_keys)
+        self._scenario_max_len = max(map(len, self._scenario_keys), default=0)
+    
+    def _get_translator(self):
+        """Create a Google translator once per thread and reuse it for every request."""
+        translator = getattr(self._local, 'translator', None)
+        if translator is None:
+            from googletrans import Translator
+            translator = self._local.translator = Translator()
+        return translator
+    
+    def _get_cache_db(self) -> sqlite3.Connection:
+        """Open the on-disk translation cache."""
+        if self._cache_db is None:
+            self._cache_db = sqlite3.connect(self.TRANSLATE_CACHE_FILE)
+            self._cache_db.execute(
+                "CREATE TABLE IF NOT EXISTS tcache (jp TEXT PRIMARY KEY, en TEXT, ts INTEGER)"
+            )
+        return self._cache_db
+    
+    def _cached_translations(self, jp_names: List[str]) -> Dict[str, str]:
+        """Look names up in the on-disk cache."""
+        if not jp_names:
+            return {}
+        placeholders = ",".join("?" * len(jp_names))
+        return dict(self._get_cache_db().execute(
+            f"SELECT jp, en FROM tcache WHERE jp IN ({placeholders})", jp_names
+        ))
+    
+    def _store_translations(self, translations: Dict[str, str]):
+        """Add successful translations to the on-disk cache."""
+        if not translations:
+            return
+        now = int(time.time())
+        db = self._get_cache_db()
+        with db:
+            db.executemany(
+                "INSERT OR REPLACE INTO tcache VALUES (?, ?, ?)",
+                [(jp, en, now) for jp, en in translations.items()],
+            )
+    
+    def _fetch_translations(
+        self,
+        jp_names: List[str],
+        limiter: Optional[RateLimiter] = None
+    ) -> Dict[str, str]:
+        """
+        Translate names with Google (network only, thread-safe).
+        
+        googletrans sends one request per name even when given a list, so
+        names are sent one at a time, each after limiter.wait(). Sharing one
+        limiter between threads keeps the total request rate under the
+        per-IP limit. Failed names are left out.
+        """
+        if not jp_names:
+            return {}
+        translator = self._get_translator()
+        translations = {}
+        for jp in jp_names:
+            if limiter is not None:
+                limiter.wait()
+            try:
+                result = translator.translate(jp, src='ja', dest='en')
+            except Exception:
+                continue
+            if result and result.text:
+                translations[jp] = result.text
+        return translations
+    
+    def translate_batch(self, jp_names: List[str]) -> List[Optional[str]]:
+        """
+        Translate Japanese names to English, REQUEST_DELAY apart.
+        
+        Names found in the on-disk cache are not sent; successful
+        translations are added to it. Failures are not cached, so they
+        are retried on the next run.
+        
+        Returns one entry per name, None where translation failed.
+        """
+        cached = self._cached_translations(jp_names)
+        fetched = self._fetch_translations(
+            [jp for jp in dict.fromkeys(jp_names) if jp not in cached], self._limiter
+        )
+        self._store_translations(fetched)
+        cached.update(fetched)
+        return [cached.get(jp) for jp in jp_names]
+    
     def translate_jp_to_en(self, jp_name: str) -> Optional[str]:
         """Translate Japanese name to English."""
-        try:
-            from googletrans import Translator
-            translator = Translator()
-            result = translator.translate(jp_name, src='ja', dest='en')
-            return result.text
-        except Exception as e:
-            return None
+        return self.translate_batch([jp_name])[0]
     
     def lookup_cn_from_scenario(self, jp_name: str) -> Optional[str]:
         """Look up CN name from scenario cache."""
@@ -114,24 +333,33 @@ class JPToENConverter:
         if jp_name in self.scenario_cn_cache:
             return self.scenario_cn_cache[jp_name]
         
-        # Try without common suffixes/variations
-        for jp, cn in self.scenario_cn_cache.items():
-            if jp in jp_name or jp_name in jp:
-                return cn
+        if not self._scenario_keys:
+            return None
+        
+        # Otherwise the earliest cached name that contains or is contained in jp_name
+        best = len(self._scenario_keys)
+        
+        # Cached names containing jp_name
+        pos = self._scenario_blob.find(jp_name)
+        if pos >= 0:
+            best = bisect_right(self._scenario_starts, pos) - 1
         
+        # Cached names that are substrings of jp_name
+        order = self._scenario_order
+        max_len = min(len(jp_name), self._scenario_max_len)
+        for start in range(len(jp_name)):
+            for end in range(start + 1, min(start + max_len, len(jp_name)) + 1):
+                i = order.get(jp_name[start:end])
+                if i is not None and i < best:
+                    best = i
+        
+        if best < len(self._scenario_keys):
+            return self.scenario_cn_cache[self._scenario_keys[best]]
         return None
     
     def is_valid_cn_name(self, cn_name: str) -> bool:
         """Check if CN name exists in the valid names list."""
-        if cn_name in self.valid_cn_names:
-            return True
-        # Also check without common suffixes
-        for suffix in ['（活动）', '（夏日）', '（圣诞）', '（万圣）', '（情人节）']:
-            if cn_name.endswith(suffix):
-                base = cn_name[:-len(suffix)]
-                if base in self.valid_cn_names:
-                    return True
-        return False
+        return cn_name in self._valid_cn_with_suffix
     
     def get_cn_name(self, jp_name: str, cn_from_jp_mapping: str) -> Tuple[str, str]:
         """
@@ -154,8 +382,20 @@ class JPToENConverter:
         # Return original but mark as invalid
         return cn_from_jp_mapping, 'invalid'
     
-    def convert_all(self, output_file: Path = None, delay: float = 0.3) -> Dict[str, dict]:
-        """Convert all JP->CN mappings to EN->CN."""
+    def convert_all(
+        self,
+        output_file: Path = None,
+        delay: float = 0.3,
+        max_workers: int = 8,
+    ) -> Dict[str, dict]:
+        """
+        Convert all JP->CN mappings to EN->CN.
+        
+        Names missing from the translation cache are sent by up to
+        max_workers threads at once, one request per name, with request
+        starts spaced delay seconds apart across all threads. Results are
+        applied and saved in batch order.
+        """
         if output_file is None:
             output_file = Path(__file__).parent / "jp_to_en_mapping.json"
         
@@ -166,47 +406,66 @@ class JPToENConverter:
                 results = json.load(f)
             print(f"Resuming from {len(results)} existing entries")
         
+        # Prune finished names once; everything below iterates only todo
         total = len(self.jp_to_cn)
-        processed = 0
+        todo = [jp_name for jp_name in self.jp_to_cn if jp_name not in results]
+        if not todo:
+            print(f"\n=== Nothing to convert: all {total} names done ===")
+            return results
+        print(f"Converting {len(todo)} of {total} names")
         
-        for jp_name, cn_name in self.jp_to_cn.items():
-            processed += 1
-            
-            # Skip if already processed
-            if jp_name in results:
-                continue
-            
-            # Translate JP to EN
-            en_name = self.translate_jp_to_en(jp_name)
-            
-            # Get validated CN name
-            final_cn, source = self.get_cn_name(jp_name, cn_name)
-            
-            results[jp_name] = {
-                'en': en_name,
-                'cn': final_cn if source != 'invalid' else '',
-                'cn_original': cn_name,
-                'source': source
-            }
-            
-            if en_name:
-                status = '✓' if source in ['valid', 'scenario'] else '?' if source == 'scenario_unverified' else '✗'
-                print(f"[{processed}/{total}] {status} {jp_name} -> {en_name} -> {final_cn} ({source})")
-            else:
-                print(f"[{processed}/{total}] ✗ {jp_name} -> ? (translation failed)")
-            
-            # Save progress periodically
-            if processed % 50 == 0:
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(results, f, ensure_ascii=False, indent=2)
-                print(f"  === Saved progress ({processed}/{total}) ===")
+        batches = [todo[i:i + self.BATCH_SIZE] for i in range(0, len(todo), self.BATCH_SIZE)]
+        
+        # Cache lookups stay on this thread (sqlite); only misses go to the pool
+        cached = [self._cached_translations(batch) for batch in batches]
+        missing = [
+            [jp for jp in batch if jp not in hits]
+            for batch, hits in zip(batches, cached)
+        ]
+        
+        # Progress bar instead of one print per name; falls back to plain prints
+        bar = tqdm(total=total, initial=total - len(todo), desc="Converting", unit="name") if HAS_TQDM else None
+        log = tqdm.write if HAS_TQDM else print
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            limiter = RateLimiter(1.0 / delay) if delay > 0 else None
+            fetched_batches = executor.map(partial(self._fetch_translations, limiter=limiter), missing)
             
-            # Rate limiting
-            time.sleep(delay)
+            for batch, translations, fetched in zip(batches, cached, fetched_batches):
+                self._store_translations(fetched)
+                translations.update(fetched)
+                
+                for jp_name in batch:
+                    en_name = translations.get(jp_name)
+                    cn_name = self.jp_to_cn[jp_name]
+                    
+                    # Get validated CN name
+                    final_cn, source = self.get_cn_name(jp_name, cn_name)
+                    
+                    results[jp_name] = {
+                        'en': en_name,
+                        'cn': final_cn if source != 'invalid' else '',
+                        'cn_original': cn_name,
+                        'source': source
+                    }
+                    
+                    processed = len(results)
+                    if not en_name:
+                        log(f"[{processed}/{total}] ✗ {jp_name} -> ? (translation failed)")
+                    elif processed % self.LOG_EVERY == 0:
+                        status = '✓' if source in ['valid', 'scenario'] else '?' if source == 'scenario_unverified' else '✗'
+                        log(f"[{processed}/{total}] {status} {jp_name} -> {en_name} -> {final_cn} ({source})")
+                
+                # Save progress after every batch
+                _save_json(results, output_file)
+                if bar is not None:
+                    bar.update(len(batch))
+        
+        if bar is not None:
+            bar.close()
         
         # Final save
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+        _save_json(results, output_file)
         
         print(f"\n=== Conversion complete: {len(results)} entries ===")
         return results
@@ -226,7 +485,7 @@ class JPToENConverter:
             data = json.load(f)
         
         # Collect valid mappings (EN->CN) that are NOT already in npc-name-en.csv
-        mappings = []
+        keyed = []  # (lowercased name, mapping)
         for jp, info in data.items():
             en = info.get('en')
             cn = info.get('cn')  # Empty if invalid
@@ -235,32 +494,34 @@ class JPToENConverter:
                 # Normalize EN name for comparison
                 en_normalized = en.strip()
                 
-                # Skip if EN name already exists in original mapping
+                # Skip if EN name already exists in original mapping;
+                # exact hits are decided before paying for lower()
                 if en_normalized in self.en_to_cn:
                     continue
-                if en_normalized.lower() in [k.lower() for k in self.en_to_cn]:
+                en_lower = en_normalized.lower()
+                if en_lower in self._en_lower:
                     continue
                 
-                mappings.append({
+                keyed.append((en_lower, {
                     'name': en_normalized,
                     'trans': cn,
                     'jp': jp,
                     'note': info.get('source', '')
-                })
+                }))
         
-        # Sort by name
-        mappings.sort(key=lambda x: x['name'].lower())
+        # Sort by name, reusing the lowercased key from the check above
+        keyed.sort(key=lambda x: x[0])
+        mappings = [m for _, m in keyed]
         
         # Write CSV
         csv_file.parent.mkdir(parents=True, exist_ok=True)
         with open(csv_file, 'w', encoding='utf-8', newline='') as f:
-            f.write("name,trans,jp,note\n")
-            for m in mappings:
-                # Escape commas in values
-                name = m['name'].replace(',', '，')
-                trans = m['trans'].replace(',', '，')
-                jp = m['jp'].replace(',', '，')
-                f.write(f"{name},{trans},{jp},{m['note']}\n")
+            writer = csv.DictWriter(
+                f, fieldnames=['name', 'trans', 'jp', 'note'],
+                quoting=csv.QUOTE_MINIMAL, lineterminator='\n',
+            )
+            writer.writeheader()
+            writer.writerows(mappings)
         
         print(f"Exported {len(mappings)} NEW mappings to {csv_file}")
         
@@ -7,12 +7,18 @@ Usage:
     python -m lib.tools.merge_chapters characters/tikoh/story/*/raw --all
 """
 
+import os
 import re
 import sys
 import argparse
 from pathlib import Path
 from collections import defaultdict
-from typing import List, Dict, Tuple
+from typing import Iterator, List, Dict, Optional, Tuple
+
+
+# Story filename: {order}_{event}_{kind}_..., where kind is the first section keyword
+_FILENAME_RE = re.compile(r'(\d+)_(.*)')
+_SECTION_KINDS = frozenset(('chapter', 'ending', 'opening', 'transit', 'observation'))
 
 
 def parse_filename(filename: str) -> Tuple[int, str, str, str, str]:
@@ -32,103 +38,113 @@ def parse_filename(filename: str) -> Tuple[int, str, str, str, str]:
     # Remove .md extension
     name = filename.replace('.md', '')
     
-    # Extract order number
-    match = re.match(r'(\d+)_(.*)', name)
+    match = _FILENAME_RE.match(name)
     if not match:
         return (999, "", "", "", name)
     
     order = int(match.group(1))
     rest = match.group(2)
     
-    # Extract event name (first part before chapter/ending/etc)
+    # Event name is everything before the first chapter/ending/etc part
     parts = rest.split('_')
-    
-    # Find where chapter/ending/opening/etc starts
-    chapter_idx = -1
-    for i, part in enumerate(parts):
-        if part in ['chapter', 'ending', 'opening', 'transit', 'observation']:
-            chapter_idx = i
-            break
-    
+    chapter_idx = next((i for i, part in enumerate(parts) if part in _SECTION_KINDS), -1)
     if chapter_idx == -1:
         return (order, rest, "", "", rest.replace('_', ' ').title())
     
     event = '_'.join(parts[:chapter_idx])
     title_parts = parts[chapter_idx:]
     
+    # First position of each part, as title_parts.index would find it
+    first: Dict[str, int] = {}
+    for i, part in enumerate(title_parts):
+        first.setdefault(part, i)
+    
     # Parse chapter and episode
     chapter = ""
     episode = ""
     
-    if 'chapter' in title_parts:
-        ch_idx = title_parts.index('chapter')
-        if ch_idx + 1 < len(title_parts):
-            chapter_num = title_parts[ch_idx + 1]
-            # Find chapter subtitle (between chapter number and episode)
-            subtitle_parts = []
-            for i in range(ch_idx + 2, len(title_parts)):
-                if title_parts[i] == 'episode':
-                    break
-                subtitle_parts.append(title_parts[i])
-            
-            if subtitle_parts:
-                chapter = f"Chapter {chapter_num} - {' '.join(subtitle_parts).title()}"
-            else:
-                chapter = f"Chapter {chapter_num}"
+    ch_idx = first.get('chapter')
+    if ch_idx is not None and ch_idx + 1 < len(title_parts):
+        chapter_num = title_parts[ch_idx + 1]
+        # Chapter subtitle runs from after the number up to "episode"
+        subtitle_parts = []
+        for part in title_parts[ch_idx + 2:]:
+            if part == 'episode':
+                break
+            subtitle_parts.append(part)
+        
+        if subtitle_parts:
+            chapter = f"Chapter {chapter_num} - {' '.join(subtitle_parts).title()}"
+        else:
+            chapter = f"Chapter {chapter_num}"
     
-    if 'episode' in title_parts:
-        ep_idx = title_parts.index('episode')
-        if ep_idx + 1 < len(title_parts):
-            episode = f"Episode {title_parts[ep_idx + 1]}"
+    ep_idx = first.get('episode')
+    if ep_idx is not None and ep_idx + 1 < len(title_parts):
+        episode = f"Episode {title_parts[ep_idx + 1]}"
     
     # Build full title
-    if chapter and episode:
-        title = f"{chapter} - {episode}"
-    elif chapter:
-        title = chapter
-    elif 'opening' in title_parts:
+    if chapter:
+        title = f"{chapter} - {episode}" if episode else chapter
+    elif 'opening' in first:
         title = "Opening"
-    elif 'ending' in title_parts:
-        # Handle ending episodes
-        if 'episode' in title_parts:
-            ep_idx = title_parts.index('episode')
-            if ep_idx + 1 < len(title_parts):
-                title = f"Ending - Episode {title_parts[ep_idx + 1]}"
-            else:
-                title = "Ending"
-        else:
-            title = "Ending"
-    elif 'transit' in title_parts:
-        if 'episode' in title_parts:
-            ep_idx = title_parts.index('episode')
-            if ep_idx + 1 < len(title_parts):
-                title = f"Transit - Episode {title_parts[ep_idx + 1]}"
-            else:
-                title = "Transit"
-        else:
-            title = "Transit"
-    elif 'observation' in title_parts:
-        if 'episode' in title_parts:
-            ep_idx = title_parts.index('episode')
-            if ep_idx + 1 < len(title_parts):
-                title = f"Observation - Episode {title_parts[ep_idx + 1]}"
-            else:
-                title = "Observation"
-        else:
-            title = "Observation"
     else:
-        title = ' '.join(title_parts).title()
+        # Ending / Transit / Observation, optionally with an episode
+        kind = next((k for k in ('ending', 'transit', 'observation') if k in first), None)
+        if kind:
+            title = f"{kind.title()} - {episode}" if episode else kind.title()
+        else:
+            title = ' '.join(title_parts).title()
     
     return (order, event, chapter, episode, title)
 
 
-def merge_chapters(raw_dir: Path, dry_run: bool = False) -> Dict:
+def _read_md_bytes(md_file: Path) -> bytes:
+    """Read a file as bytes with newlines normalized to LF, as text mode would."""
+    raw = md_file.read_bytes()
+    if b'\r' in raw:
+        raw = raw.replace(b'\r\n', b'\n').replace(b'\r', b'\n')
+    return raw
+
+
+def _strip_bytes(raw: bytes) -> bytes:
+    """bytes equivalent of str.strip() on UTF-8 text."""
+    body = raw.strip()
+    # bytes.strip only knows ASCII whitespace; decode if Unicode/control
+    # whitespace could be left at either end
+    if body and any(b >= 0x80 or 0x1c <= b <= 0x1f for b in (body[0], body[-1])):
+        return raw.decode('utf-8').strip().encode('utf-8')
+    return body
+
+
+def _list_md_files(raw_dir: Path) -> List[Path]:
+    """Sorted *.md files in a directory (one scandir, no per-file stat)."""
+    try:
+        with os.scandir(raw_dir) as it:
+            names = [e.name for e in it if e.name.endswith('.md') and e.is_file()]
+    except OSError:
+        return []
+    names.sort()
+    return [raw_dir / name for name in names]
+
+
+def iter_raw_dirs(base_dir: Path) -> Iterator[Tuple[Path, List[Path]]]:
+    """Yield (raw_dir, sorted md files) for every {story}/raw under base_dir."""
+    with os.scandir(base_dir) as it:
+        story_dirs = sorted(e.path for e in it if e.is_dir())
+    for story_dir in story_dirs:
+        raw_dir = Path(story_dir) / "raw"
+        if raw_dir.is_dir():
+            yield raw_dir, _list_md_files(raw_dir)
+
+
+def merge_chapters(raw_dir: Path, dry_run: bool = False, md_files: Optional[List[Path]] = None) -> Dict:
     """
     Merge episode files by chapter.
     
     Args:
         raw_dir: Directory containing raw/*.md files
         dry_run: If True, only show what would be done
+        md_files: Sorted episode files, if already listed (default: scan raw_dir)
     
     Returns:
         {merged_count, file_count_before, file_count_after}
@@ -137,7 +153,8 @@ def merge_chapters(raw_dir: Path, dry_run: bool = False) -> Dict:
         print(f"Error: Directory not found: {raw_dir}")
         return {"error": "Directory not found"}
     
-    md_files = sorted(raw_dir.glob('*.md'))
+    if md_files is None:
+        md_files = _list_md_files(raw_dir)
     if not md_files:
         print(f"No .md files found in {raw_dir}")
         return {"error": "No files found"}
@@ -188,14 +205,14 @@ def merge_chapters(raw_dir: Path, dry_run: bool = False) -> Dict:
     
     # Process standalone files first
     for order, md_file, title in sorted(standalone):
-        content = md_file.read_text(encoding='utf-8')
+        content = _read_md_bytes(md_file)
         
         # Create new filename
         slug = title.lower().replace(' ', '_').replace('-', '')
         new_filename = f"{file_index:02d}_{slug}.md"
         new_path = merged_dir / new_filename
         
-        new_path.write_text(content, encoding='utf-8')
+        new_path.write_bytes(content)
         print(f"  [{file_index:02d}] {title} (standalone)")
         file_index += 1
     
@@ -208,20 +225,21 @@ def merge_chapters(raw_dir: Path, dry_run: bool = False) -> Dict:
         event_name = None
         
         for order, md_file, title, episode in episodes:
-            content = md_file.read_text(encoding='utf-8')
+            # Work on bytes; only the title line is decoded
+            content = _read_md_bytes(md_file)
             
             # Extract event name from first line if present
-            lines = content.split('\n')
-            if lines and lines[0].startswith('#'):
+            if content.startswith(b'#'):
+                first_line, _, body = content.partition(b'\n')
                 if not event_name:
                     # Extract event name from first episode
-                    event_name = lines[0].replace('#', '').strip().split('-')[0].strip()
+                    event_name = first_line.decode('utf-8').replace('#', '').strip().split('-')[0].strip()
                 # Remove the title line
-                content = '\n'.join(lines[1:]).strip()
+                content = _strip_bytes(body)
             
             # Add episode header
             if episode:
-                merged_content.append(f"## {episode}\n\n{content}")
+                merged_content.append(b'## ' + episode.encode('utf-8') + b'\n\n' + content)
             else:
                 merged_content.append(content)
         
@@ -232,9 +250,9 @@ def merge_chapters(raw_dir: Path, dry_run: bool = False) -> Dict:
         
         # Add main chapter title
         full_title = f"{event_name} - {chapter}" if event_name else chapter
-        full_content = f"# {full_title}\n\n" + '\n\n'.join(merged_content)
-        
-        new_path.write_text(full_content, encoding='utf-8')
+        new_path.write_bytes(
+            b'# ' + full_title.encode('utf-8') + b'\n\n' + b'\n\n'.join(merged_content)
+        )
         print(f"  [{file_index:02d}] {chapter} ({len(episodes)} episodes merged)")
         file_index += 1
     
@@ -273,14 +291,14 @@ def main():
     if args.all:
         # Find all raw directories
         base_dir = Path(args.directory).parent
-        raw_dirs = list(base_dir.glob('*/raw'))
+        raw_dirs = list(iter_raw_dirs(base_dir))
         
         print(f"Found {len(raw_dirs)} raw directories")
-        for raw_dir in raw_dirs:
+        for raw_dir, md_files in raw_dirs:
             print(f"\n{'='*60}")
             print(f"Processing: {raw_dir}")
             print(f"{'='*60}")
-            merge_chapters(raw_dir, args.dry_run)
+            merge_chapters(raw_dir, args.dry_run, md_files)
     else:
         merge_chapters(Path(args.directory), args.dry_run)
 
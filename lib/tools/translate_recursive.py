@@ -1,34 +1,59 @@
 import os
+import argparse
 from pathlib import Path
 from lib.translators.gemini import translate_file
+from lib.utils.concurrency import run_concurrently
+from lib.utils.files import list_files
 
-def translate_recursive(input_dir, output_dir):
+def translate_recursive(input_dir, output_dir, workers=4):
     input_p = Path(input_dir)
     output_p = Path(output_dir)
     
-    files = list(input_p.rglob("*.md"))
+    # Sorted, so resumed runs go in a stable order
+    files = list_files(input_p, ".md")
     print(f"Total files found: {len(files)}")
     
-    # Sort files to ensure stable order
-    files.sort()
-    
+    tasks = []
+    created_dirs = set()
     for i, md_file in enumerate(files):
         rel_path = md_file.relative_to(input_p)
         output_file = output_p / rel_path
-        
-        # Skip if output already exists (optional, but good for resuming)
-        # if output_file.exists():
-        #     print(f"[{i+1}/{len(files)}] Skipping (already exists): {rel_path}")
-        #     continue
-            
-        print(f"\n[{i+1}/{len(files)}] Translating: {rel_path}")
-        translate_file(str(md_file), str(output_file))
+    
+        # Skip if output is newer than its source (resuming)
+        try:
+            if output_file.stat().st_mtime >= md_file.stat().st_mtime:
+                print(f"[{i+1}/{len(files)}] Skipping (up to date): {rel_path}")
+                continue
+        except FileNotFoundError:
+            pass
+    
+        # Create each output directory once, up front
+        if output_file.parent not in created_dirs:
+            output_file.parent.mkdir(parents=True, exist_ok=True)
+            created_dirs.add(output_file.parent)
+    
+        tasks.append((md_file, output_file))
+    
+    results = run_concurrently(
+        lambda task: translate_file(str(task[0]), str(task[1])),
+        tasks, workers, return_exceptions=True,
+    )
+    for done, ((md_file, _), result) in enumerate(results, 1):
+        rel_path = md_file.relative_to(input_p)
+        if isinstance(result, Exception):
+            print(f"\n[{done}/{len(tasks)}] Failed: {rel_path} ({result})")
+        else:
+            print(f"\n[{done}/{len(tasks)}] Translated: {rel_path}")
 
 if __name__ == "__main__":
-    import sys
-    if len(sys.argv) < 3:
-        print("Usage: python lib/tools/translate_recursive.py <input_dir> <output_dir>")
-        sys.exit(1)
-    translate_recursive(sys.argv[1], sys.argv[2])
-
-
+    parser = argparse.ArgumentParser(description="Translate all markdown files under a directory")
+    parser.add_argument("input_dir")
+    parser.add_argument("output_dir")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Concurrent translation requests (default: 4)"
+    )
+    args = parser.parse_args()
+    translate_recursive(args.input_dir, args.output_dir, args.workers)
@@ -4,7 +4,9 @@ Quick translation utility - Multi-engine support.
 
 Usage:
     python -m lib.translate claude ./raw ./trans     # Claude (best quality)
+    python -m lib.translate claude ./raw ./trans --batch  # Batch API (50% off)
     python -m lib.translate openai ./raw ./trans     # GPT-4o-mini (good value)
+    python -m lib.translate openai ./raw ./trans --concurrency 8  # 8 files at a time
     python -m lib.translate gemini ./raw ./trans     # Gemini Flash (cheapest!)
     python -m lib.translate deepl ./raw ./trans      # DeepL (500K free/month)
     python -m lib.translate caiyun ./raw ./trans     # Caiyun (CN service)
@@ -14,34 +16,55 @@ Usage:
 
 import sys
 import argparse
+import functools
 from pathlib import Path
 
 
-def translate_claude(raw_dir: str, trans_dir: str, source_lang: str = 'en'):
+def translate_claude(raw_dir: str, trans_dir: str, source_lang: str = 'en', concurrency: int = 1):
     """Translate using Claude (auto-detects voice tables)."""
     from .translators.claude import claude_translate_directory
-    return claude_translate_directory(raw_dir, trans_dir, source_lang)
+    return claude_translate_directory(raw_dir, trans_dir, source_lang, concurrency=concurrency)
 
 
-def translate_openai(raw_dir: str, trans_dir: str, source_lang: str = 'en'):
+def translate_openai(raw_dir: str, trans_dir: str, source_lang: str = 'en', concurrency: int = 1):
     """Translate using OpenAI GPT."""
     from .translators.openai_translator import translate_directory
-    count = translate_directory(raw_dir, trans_dir)
+    count = translate_directory(raw_dir, trans_dir, concurrency)
     return {"translated": count}
 
 
-def translate_gemini(raw_dir: str, trans_dir: str, source_lang: str = 'en'):
+def translate_batch(raw_dir: str, trans_dir: str, engine: str):
+    """Translate through the provider Batch API: submit, wait, download."""
+    from .translators.batch_translator import (
+        submit_batch, wait_for_batch, download_results, BATCH_SUCCESS_STATUSES,
+    )
+    batch_id = submit_batch(raw_dir, engine, trans_dir)
+    if not batch_id:
+        print("All files served from the translation cache")
+        return {"translated": 0}
+    status = wait_for_batch(batch_id, engine)
+    if status["status"] not in BATCH_SUCCESS_STATUSES:
+        print(f"Batch {batch_id} finished with status: {status['status']}")
+        return {"translated": 0, "batch_id": batch_id}
+    count = download_results(batch_id, trans_dir, engine, raw_dir)
+    return {"translated": count, "batch_id": batch_id}
+
+
+def translate_gemini(raw_dir: str, trans_dir: str, source_lang: str = 'en', concurrency: int = 1):
     """Translate using Google Gemini (cheapest!)."""
     from .translators.gemini import translate_directory
-    count = translate_directory(raw_dir, trans_dir)
+    count = translate_directory(raw_dir, trans_dir, concurrency)
     return {"translated": count}
 
 
+# CLI --lang values -> DeepL source language codes
+DEEPL_LANGS = {'ja': 'JA', 'en': 'EN', 'jp': 'JA'}
+
+
 def translate_deepl(raw_dir: str, trans_dir: str, source_lang: str = 'ja'):
     """Translate using DeepL (500K free chars/month)."""
     from .translators.deepl import translate_directory
-    lang_map = {'ja': 'JA', 'en': 'EN', 'jp': 'JA'}
-    count = translate_directory(raw_dir, trans_dir, lang_map.get(source_lang, 'JA'), 'ZH')
+    count = translate_directory(raw_dir, trans_dir, DEEPL_LANGS.get(source_lang, 'JA'), 'ZH')
     return {"translated": count}
 
 
@@ -63,34 +86,75 @@ def lookup_name(name: str):
     
     # Show similar names
     print(f"Not found: {name}")
-    similar = [k for k in translator.npc_names.keys() if name.lower() in k.lower()]
+    similar = translator.find_similar_names(name)
     if similar:
         print("Similar names:")
-        for s in similar[:5]:
+        for s in similar:
             print(f"  {s} → {translator.npc_names[s]}")
     
     return None
 
 
+@functools.lru_cache(maxsize=4)
+def _encoder(model: str = "gpt-4o"):
+    """tiktoken encoder for a model, built once per process."""
+    import tiktoken
+    return tiktoken.encoding_for_model(model)
+
+
+# UTF-8 continuation bytes (0b10xxxxxx); every other byte starts a character
+_UTF8_CONTINUATION = bytes(range(0x80, 0xC0))
+
+
+def _utf8_len(data: bytes) -> int:
+    """Character count of UTF-8 bytes, without decoding them."""
+    return len(data.translate(None, _UTF8_CONTINUATION))
+
+
+def _count_tokens(enc, content: str, line_tokens: dict) -> int:
+    """
+    Count tokens line by line, encoding each distinct line only once.
+    
+    Story files repeat headers, speaker names and table rows, so counts are
+    memoized in `line_tokens` across files. Each newline is counted as one
+    token, which keeps the total within a few percent of encoding the whole
+    file at once.
+    """
+    lines = content.split('\n')
+    new_lines = [line for line in dict.fromkeys(lines) if line not in line_tokens]
+    if new_lines:
+        for line, tokens in zip(new_lines, enc.encode_batch(new_lines)):
+            line_tokens[line] = len(tokens)
+    return sum(line_tokens[line] for line in lines) + len(lines) - 1
+
+
 def estimate_cost(raw_dir: str):
     """Estimate translation cost for all engines."""
-    import tiktoken
+    import hashlib
+    from .translators.batch_translator import file_manifest
     
     path = Path(raw_dir)
-    enc = tiktoken.encoding_for_model("gpt-4o")
+    enc = _encoder()
     
     total_chars = 0
     total_tokens = 0
+    line_tokens = {}
+    file_counts = {}  # content digest -> (chars, tokens), for identical files
     
     if path.is_file():
-        files = [path]
+        files = {path: (None, hashlib.blake2b(path.read_bytes(), digest_size=16).digest())}
     else:
-        files = list(path.glob("**/*.md"))
+        # Digests are shared with submit_batch through the .batch manifest
+        files = file_manifest(path, recursive=True)
     
-    for f in files:
-        content = f.read_text(encoding='utf-8', errors='ignore')
-        total_chars += len(content)
-        total_tokens += len(enc.encode(content))
+    for f, (_, digest) in files.items():
+        if digest not in file_counts:
+            data = f.read_bytes()
+            content = data.decode('utf-8', errors='ignore')
+            file_counts[digest] = (_utf8_len(data), _count_tokens(enc, content, line_tokens))
+        chars, tokens = file_counts[digest]
+        total_chars += chars
+        total_tokens += tokens
     
     print(f"📊 Translation Cost Estimate")
     print(f"=" * 50)
@@ -148,19 +212,25 @@ Engines:
     claude_parser.add_argument("raw_dir", help="Raw content directory")
     claude_parser.add_argument("trans_dir", help="Output directory")
     claude_parser.add_argument("--lang", default="en", help="Source language")
+    claude_parser.add_argument("--batch", action="store_true", help="Use batch API (50%% discount, waits for results)")
+    claude_parser.add_argument("--concurrency", type=int, default=4, help="Files translated in parallel (default: 4)")
+    claude_parser.add_argument("--no-cache", action="store_true", help="Always call the API (skip the response cache)")
     
     # OpenAI command
     openai_parser = subparsers.add_parser("openai", help="Translate with GPT-4o-mini")
     openai_parser.add_argument("raw_dir", help="Raw content directory")
     openai_parser.add_argument("trans_dir", help="Output directory")
     openai_parser.add_argument("--lang", default="en", help="Source language")
+    openai_parser.add_argument("--batch", action="store_true", help="Use batch API (50%% discount, waits for results)")
+    openai_parser.add_argument("--concurrency", type=int, default=4, help="Files translated in parallel (default: 4)")
     
     # Gemini command
     gemini_parser = subparsers.add_parser("gemini", help="Translate with Gemini (cheapest!)")
     gemini_parser.add_argument("raw_dir", help="Raw content directory")
     gemini_parser.add_argument("trans_dir", help="Output directory")
     gemini_parser.add_argument("--lang", default="en", help="Source language")
-    gemini_parser.add_argument("--batch", action="store_true", help="Use batch API (50% discount, 24h)")
+    gemini_parser.add_argument("--batch", action="store_true", help="Use batch API (50%% discount, 24h)")
+    gemini_parser.add_argument("--concurrency", type=int, default=4, help="Files translated in parallel (default: 4)")
     
     # DeepL command
     deepl_parser = subparsers.add_parser("deepl", help="Translate with DeepL (500K free/month)")
@@ -173,6 +243,7 @@ Engines:
     caiyun_parser.add_argument("raw_dir", help="Raw content directory")
     caiyun_parser.add_argument("trans_dir", help="Output directory")
     caiyun_parser.add_argument("--lang", default="en", help="Source language")
+    caiyun_parser.add_argument("--no-cache", action="store_true", help="Always call the API (skip the response cache)")
     
     # Lookup command
     lookup_parser = subparsers.add_parser("lookup", help="Lookup character name")
@@ -184,11 +255,18 @@ Engines:
     
     args = parser.parse_args()
     
-    if args.command == "claude":
-        result = translate_claude(args.raw_dir, args.trans_dir, args.lang)
+    if getattr(args, 'no_cache', False):
+        from .translators.translation_cache import disable_response_cache
+        disable_response_cache()
+    
+    if args.command in ("claude", "openai") and args.batch:
+        result = translate_batch(args.raw_dir, args.trans_dir, args.command)
+        print(f"Translated {result.get('translated', 0)} files")
+    elif args.command == "claude":
+        result = translate_claude(args.raw_dir, args.trans_dir, args.lang, args.concurrency)
         print(f"Translated {result.get('translated', 0)} files")
     elif args.command == "openai":
-        result = translate_openai(args.raw_dir, args.trans_dir, args.lang)
+        result = translate_openai(args.raw_dir, args.trans_dir, args.lang, args.concurrency)
         print(f"Translated {result.get('translated', 0)} files")
     elif args.command == "gemini":
         if getattr(args, 'batch', False):
@@ -197,7 +275,7 @@ Engines:
             print(f"\nBatch submitted: {batch_id}")
             print("Check status: python -m lib.translators.batch_translator status {batch_id}")
         else:
-            result = translate_gemini(args.raw_dir, args.trans_dir, args.lang)
+            result = translate_gemini(args.raw_dir, args.trans_dir, args.lang, args.concurrency)
             print(f"Translated {result.get('translated', 0)} files")
     elif args.command == "deepl":
         result = translate_deepl(args.raw_dir, args.trans_dir, args.lang)
@@ -14,23 +14,40 @@ Usage:
     from lib.translators import translate_csv_file, analyze_csv_directory
 """
 
-from .blhxfy import BLHXFYTranslator, translator
-from .prompts import get_all_mappings
-from .voice_translator import is_voice_table, translate_voice_table
-from .claude import (
-    translate_file,
-    translate_directory,
-    translate_story,
-    translate_lore,
-    DEFAULT_MODE,
-)
-from .csv_translator import (
-    translate_csv_file,
-    translate_csv_directory,
-    analyze_csv_directory,
-    count_untranslated,
-    detect_csv_format,
-)
+import importlib
+
+# Submodules load on first attribute access (PEP 562), so e.g. the name
+# lookup CLI does not pay for importing the Claude/anthropic stack
+_LAZY_ATTRS = {
+    'BLHXFYTranslator': 'blhxfy',
+    'translator': 'blhxfy',
+    'get_all_mappings': 'prompts',
+    'is_voice_table': 'voice_translator',
+    'translate_voice_table': 'voice_translator',
+    'translate_file': 'claude',
+    'translate_directory': 'claude',
+    'translate_story': 'claude',
+    'translate_lore': 'claude',
+    'DEFAULT_MODE': 'claude',
+    'translate_csv_file': 'csv_translator',
+    'translate_csv_directory': 'csv_translator',
+    'analyze_csv_directory': 'csv_translator',
+    'count_untranslated': 'csv_translator',
+    'detect_csv_format': 'csv_translator',
+}
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + list(_LAZY_ATTRS))
 
 __all__ = [
     # BLHXFY
@@ -13,41 +13,288 @@ Usage:
     # Check status
     python -m lib.translators.batch_translator status <batch_id>
     
+    # Wait until finished (exponential backoff polling)
+    python -m lib.translators.batch_translator wait <batch_id>
+    
     # Download results when ready
     python -m lib.translators.batch_translator download <batch_id> ./trans
 """
+import io
 import os
+import sys
 import json
 import time
+import functools
+import heapq
+import hashlib
+import tarfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import List, Dict, Iterator, Optional, Tuple
 
 from dotenv import load_dotenv
+
 load_dotenv(Path(__file__).parent.parent.parent / ".env")
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .translation_cache import TranslationCache
+from ..utils.files import scan_files
+
+
+def batch_model(engine: str) -> str:
+    """Model used for batch requests of an engine."""
+    if engine == "claude":
+        return os.environ.get("CLAUDE_MODEL", "claude-sonnet-4-20250514")
+    return os.environ.get("OPENAI_MODEL", "gpt-4o-mini")
+
+
+@functools.lru_cache(maxsize=1)
+def _openai_client():
+    """Shared OpenAI client; polling reuses its connection pool."""
+    from openai import OpenAI
+    return OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+
+
+@functools.lru_cache(maxsize=1)
+def _claude_client():
+    """Shared Anthropic client; polling reuses its connection pool."""
+    import anthropic
+    return anthropic.Anthropic(api_key=os.environ.get("CLAUDE_API_KEY"))
+
+
+def _loads(data):
+    """Parse JSON from str or bytes (orjson when installed)."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dumps(obj) -> bytes:
+    """Compact JSON as UTF-8 bytes (orjson when installed)."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
+def _dumps_line(obj) -> bytes:
+    """One JSONL line as UTF-8 bytes."""
+    return _dumps(obj) + b'\n'
+
+
+def _scan_md_files(root: Path, recursive: bool = False) -> List[Tuple[str, os.DirEntry]]:
+    """Sorted (path, DirEntry) for *.md files under root, via os.scandir."""
+    return scan_files(root, '.md', recursive)
+
+
+def list_md_files(root: Path, recursive: bool = False) -> List[Path]:
+    """
+    Sorted *.md files under root.
+    
+    Walks with os.scandir, so file/dir checks come from the directory
+    entries instead of a stat per path like Path.glob.
+    """
+    return [Path(p) for p, _ in _scan_md_files(root, recursive)]
+
+
+def file_manifest(root: Path, recursive: bool = False) -> Dict[Path, Tuple[int, bytes]]:
+    """
+    {path: (size, content digest)} for the *.md files under root.
+    
+    Sizes and mtimes come from the scandir entries. Digests are kept in
+    .batch/{root name}_manifest.json next to root and only recomputed for
+    files whose size or mtime changed, so running `cost` and then a batch
+    submit hashes the directory once.
+    """
+    root = Path(root)
+    manifest_path = root.parent / ".batch" / f"{root.name}_manifest.json"
+    try:
+        rows = _loads(manifest_path.read_bytes())
+    except (OSError, ValueError):
+        rows = {}
+    
+    scanned = []
+    for path, entry in _scan_md_files(root, recursive):
+        st = entry.stat()
+        scanned.append((path, os.path.relpath(path, root), st.st_size, st.st_mtime_ns))
+    
+    stale = [
+        (path, rel) for path, rel, size, mtime in scanned
+        if rows.get(rel, [None, None])[:2] != [size, mtime]
+    ]
+    hashed = {}
+    if stale:
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            hashed = dict(zip(
+                (rel for _, rel in stale),
+                executor.map(_digest, (Path(path) for path, _ in stale)),
+            ))
+    
+    # Rows outside this scan (subdirectories of a non-recursive scan) are kept
+    seen = {rel for _, rel, _, _ in scanned}
+    new_rows = {
+        rel: row for rel, row in rows.items()
+        if rel not in seen and (not recursive and os.sep in rel)
+    }
+    for path, rel, size, mtime in scanned:
+        digest = hashed[rel].hex() if rel in hashed else rows[rel][2]
+        new_rows[rel] = [size, mtime, digest]
+    
+    if new_rows != rows:
+        try:
+            manifest_path.parent.mkdir(exist_ok=True)
+            manifest_path.write_bytes(_dumps(new_rows))
+        except OSError:
+            pass
+    
+    return {
+        Path(path): (size, bytes.fromhex(new_rows[rel][2]))
+        for path, rel, size, _ in scanned
+    }
+
+
+def read_texts(files: List[Path], max_workers: int = 8) -> Iterator[str]:
+    """
+    Yield the UTF-8 contents of files, in order.
+    
+    Reads are issued from a thread pool so the open/read round-trips of
+    many small files overlap instead of running one after another.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for data in executor.map(Path.read_bytes, files):
+            yield data.decode('utf-8')
+
+
+def _digest(path: Path) -> bytes:
+    return hashlib.blake2b(path.read_bytes(), digest_size=16).digest()
+
+
+def dedupe_files(
+    files: List[Path],
+    known: Optional[Dict[Path, bytes]] = None
+) -> Tuple[List[Path], Dict[str, List[str]], Dict[str, bytes]]:
+    """
+    Drop files whose content repeats an earlier file.
+    
+    Args:
+        files: Files to check, in order
+        known: Precomputed content digests (files are hashed otherwise)
+    
+    Returns:
+        (unique files, {kept filename: [duplicate filenames]},
+         {kept filename: content digest})
+    """
+    seen: Dict[bytes, Path] = {}
+    unique = []
+    duplicates: Dict[str, List[str]] = {}
+    digests: Dict[str, bytes] = {}
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        file_digests = [known[f] for f in files] if known is not None else executor.map(_digest, files)
+        for file_path, digest in zip(files, file_digests):
+            kept = seen.setdefault(digest, file_path)
+            if kept is file_path:
+                unique.append(file_path)
+                digests[file_path.name] = digest
+            else:
+                duplicates.setdefault(kept.name, []).append(file_path.name)
+    return unique, duplicates, digests
+
+
+class _SavedLog:
+    """Collects "Saved:" lines and writes them to stdout in blocks."""
+    
+    BLOCK = 256
+    
+    def __init__(self):
+        self.lines: List[str] = []
+    
+    def add(self, name: str):
+        self.lines.append(f"  Saved: {name}\n")
+        if len(self.lines) >= self.BLOCK:
+            self.flush()
+    
+    def flush(self):
+        if self.lines:
+            sys.stdout.write("".join(self.lines))
+            sys.stdout.flush()
+            self.lines.clear()
+
+
+def _write_result(output_path: Path, data: bytes, copies: List[str] = ()) -> int:
+    """Write one translation plus any duplicate-content copies. Returns files written."""
+    output_path.write_bytes(data)
+    for name in copies:
+        output_path.with_name(name).write_bytes(data)
+    return 1 + len(copies)
+
+
+def build_batch_prompt(engine: str, content: str) -> str:
+    """The prompt a batch request for content is sent with (glossary included)."""
+    if engine == "openai":
+        from .openai_translator import build_prompt
+        return build_prompt(content)
+    from .prompts import build_story_prompt_full, extract_speakers
+    return build_story_prompt_full(content, extract_speakers(content))
+
+
+def build_batch_prompts(
+    files: List[Path],
+    engine: str
+) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """
+    Build each file's batch prompt and its translation cache key.
+    
+    Keys hash the exact prompt with the content (TranslationCache.prompt_key),
+    so a glossary update that changes a prompt also misses the cache.
+    
+    Returns:
+        ({filename: prompt}, {filename: cache key})
+    """
+    model = batch_model(engine)
+    prompts = {}
+    keys = {}
+    for file_path, content in zip(files, read_texts(files)):
+        prompt = build_batch_prompt(engine, content)
+        prompts[file_path.name] = prompt
+        keys[file_path.name] = TranslationCache.prompt_key(engine, model, prompt, content)
+    return prompts, keys
+
 
 # =============================================================================
 # OPENAI BATCH API (50% discount)
 # =============================================================================
 
-def openai_create_batch_file(files: List[Path], output_path: Path) -> Path:
-    """Create JSONL batch file for OpenAI."""
-    from .openai_translator import build_prompt
+def openai_create_batch_file(
+    files: List[Path],
+    output_path: Path,
+    start: int = 0,
+    prompts: Optional[Dict[str, str]] = None
+) -> Path:
+    """
+    Create JSONL batch file for OpenAI (request numbers begin at start).
     
-    jsonl_path = output_path / f"batch_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+    prompts maps filenames to system prompts already built by
+    build_batch_prompts; missing ones are built here.
+    """
+    stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    jsonl_path = output_path / (f"batch_{stamp}.jsonl" if not start else f"batch_{stamp}_{start}.jsonl")
     
-    with open(jsonl_path, 'w', encoding='utf-8') as f:
-        for i, file_path in enumerate(files):
-            content = file_path.read_text(encoding='utf-8')
-            prompt = build_prompt(content)
+    model = batch_model("openai")
+    
+    with open(jsonl_path, 'wb') as f:
+        for i, (file_path, content) in enumerate(zip(files, read_texts(files)), start):
+            prompt = (prompts or {}).get(file_path.name) or build_batch_prompt("openai", content)
             
             request = {
                 "custom_id": f"request-{i}-{file_path.stem}",
                 "method": "POST",
                 "url": "/v1/chat/completions",
                 "body": {
-                    "model": os.environ.get("OPENAI_MODEL", "gpt-4o-mini"),
+                    "model": model,
                     "messages": [
                         {"role": "system", "content": prompt},
                         {"role": "user", "content": content}
@@ -55,7 +302,7 @@ def openai_create_batch_file(files: List[Path], output_path: Path) -> Path:
                     "max_tokens": 16000
                 }
             }
-            f.write(json.dumps(request, ensure_ascii=False) + '\n')
+            f.write(_dumps_line(request))
     
     print(f"Created batch file: {jsonl_path}")
     return jsonl_path
@@ -63,9 +310,7 @@ def openai_create_batch_file(files: List[Path], output_path: Path) -> Path:
 
 def openai_submit_batch(jsonl_path: Path) -> str:
     """Submit batch job to OpenAI. Returns batch_id."""
-    from openai import OpenAI
-    
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    client = _openai_client()
     
     # Upload file
     with open(jsonl_path, 'rb') as f:
@@ -89,9 +334,7 @@ def openai_submit_batch(jsonl_path: Path) -> str:
 
 def openai_check_batch(batch_id: str) -> Dict:
     """Check batch status."""
-    from openai import OpenAI
-    
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    client = _openai_client()
     batch = client.batches.retrieve(batch_id)
     
     return {
@@ -108,11 +351,20 @@ def openai_check_batch(batch_id: str) -> Dict:
     }
 
 
-def openai_download_results(batch_id: str, output_dir: Path, file_mapping: Dict[str, str]) -> int:
-    """Download batch results and save to files."""
-    from openai import OpenAI
+def openai_download_results(
+    batch_id: str,
+    output_dir: Path,
+    file_mapping: Dict[str, str],
+    duplicates: Optional[Dict[str, List[str]]] = None,
+    cache_keys: Optional[Dict[str, str]] = None
+) -> int:
+    """
+    Download batch results and save to files (and their duplicates).
     
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    Results for files listed in cache_keys are also added to the
+    translation cache.
+    """
+    client = _openai_client()
     batch = client.batches.retrieve(batch_id)
     
     if batch.status != "completed":
@@ -123,26 +375,38 @@ def openai_download_results(batch_id: str, output_dir: Path, file_mapping: Dict[
         print("No output file available")
         return 0
     
-    # Download results
+    # Download results; lines are parsed straight from the raw bytes
     content = client.files.content(batch.output_file_id)
-    results = content.text.strip().split('\n')
     
     output_dir.mkdir(parents=True, exist_ok=True)
-    count = 0
-    
-    for line in results:
-        result = json.loads(line)
-        custom_id = result["custom_id"]
-        
-        if result["response"]["status_code"] == 200:
-            translation = result["response"]["body"]["choices"][0]["message"]["content"]
+    log = _SavedLog()
+    cached = {}
+    
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        futures = []
+        for line in content.content.splitlines():
+            if not line.strip():
+                continue
+            result = _loads(line)
+            custom_id = result["custom_id"]
             
-            # Extract filename from custom_id
-            filename = file_mapping.get(custom_id, f"{custom_id}.md")
-            output_path = output_dir / filename
-            output_path.write_text(translation, encoding='utf-8')
-            count += 1
-            print(f"  Saved: {output_path.name}")
+            if result["response"]["status_code"] == 200:
+                translation = result["response"]["body"]["choices"][0]["message"]["content"]
+                
+                # Extract filename from custom_id
+                filename = file_mapping.get(custom_id, f"{custom_id}.md")
+                output_path = output_dir / filename
+                copies = (duplicates or {}).get(filename, [])
+                futures.append(executor.submit(
+                    _write_result, output_path, translation.encode('utf-8'), copies
+                ))
+                log.add(output_path.name)
+                if cache_keys and filename in cache_keys:
+                    cached[cache_keys[filename]] = translation
+        count = sum(future.result() for future in futures)
+    
+    TranslationCache().put_many("openai", batch_model("openai"), cached)
+    log.flush()
     
     return count
 
@@ -151,20 +415,19 @@ def openai_download_results(batch_id: str, output_dir: Path, file_mapping: Dict[
 # ANTHROPIC BATCH API (50% discount)
 # =============================================================================
 
-def claude_create_batch_requests(files: List[Path]) -> List[Dict]:
-    """Create batch requests for Claude."""
-    from .prompts import build_story_prompt_full, extract_speakers
-    
+def claude_create_batch_requests(
+    files: List[Path],
+    prompts: Optional[Dict[str, str]] = None
+) -> List[Dict]:
+    """Create batch requests for Claude (prompts as in openai_create_batch_file)."""
     requests = []
-    for file_path in files:
-        content = file_path.read_text(encoding='utf-8')
-        speakers = extract_speakers(content)
-        prompt = build_story_prompt_full(content, speakers)
+    for file_path, content in zip(files, read_texts(files)):
+        prompt = (prompts or {}).get(file_path.name) or build_batch_prompt("claude", content)
         
         requests.append({
             "custom_id": file_path.stem,
             "params": {
-                "model": os.environ.get("CLAUDE_MODEL", "claude-sonnet-4-20250514"),
+                "model": batch_model("claude"),
                 "max_tokens": 8192,
                 "messages": [
                     {"role": "user", "content": f"{prompt}\n\n{content}"}
@@ -177,9 +440,7 @@ def claude_create_batch_requests(files: List[Path]) -> List[Dict]:
 
 def claude_submit_batch(requests: List[Dict]) -> str:
     """Submit batch to Anthropic. Returns batch_id."""
-    import anthropic
-    
-    client = anthropic.Anthropic(api_key=os.environ.get("CLAUDE_API_KEY"))
+    client = _claude_client()
     
     batch = client.messages.batches.create(requests=requests)
     
@@ -192,9 +453,7 @@ def claude_submit_batch(requests: List[Dict]) -> str:
 
 def claude_check_batch(batch_id: str) -> Dict:
     """Check Claude batch status."""
-    import anthropic
-    
-    client = anthropic.Anthropic(api_key=os.environ.get("CLAUDE_API_KEY"))
+    client = _claude_client()
     batch = client.messages.batches.retrieve(batch_id)
     
     return {
@@ -206,23 +465,105 @@ def claude_check_batch(batch_id: str) -> Dict:
     }
 
 
-def claude_download_results(batch_id: str, output_dir: Path) -> int:
-    """Download Claude batch results."""
-    import anthropic
-    
-    client = anthropic.Anthropic(api_key=os.environ.get("CLAUDE_API_KEY"))
+# Output paths with these suffixes get every result in one file
+ARCHIVE_SUFFIXES = {".tar", ".ndjson"}
+
+
+def _write_archive(archive_path: Path, entries) -> int:
+    """
+    Write (filename, text) entries into a single .tar or .ndjson file.
     
-    output_dir.mkdir(parents=True, exist_ok=True)
+    One open file instead of one per translation; NDJSON lines are
+    {"name": ..., "text": ...}.
+    """
+    archive_path.parent.mkdir(parents=True, exist_ok=True)
     count = 0
+    if archive_path.suffix == ".tar":
+        now = time.time()
+        with tarfile.open(archive_path, "w|") as tf:
+            for name, text in entries:
+                data = text.encode('utf-8')
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                info.mtime = now
+                tf.addfile(info, io.BytesIO(data))
+                count += 1
+    else:
+        with open(archive_path, 'wb') as f:
+            for name, text in entries:
+                f.write(_dumps_line({"name": name, "text": text}))
+                count += 1
+    print(f"  Saved {count} files to {archive_path}")
+    return count
+
+
+def _claude_download_archive(
+    parts: List[Tuple[str, Dict[str, List[str]], Dict[str, str]]],
+    archive_path: Path
+) -> int:
+    """
+    Stream the results of every (batch_id, duplicates, cache_keys) part
+    into one .tar or .ndjson file, adding them to the translation cache.
+    """
+    client = _claude_client()
+    cached = {}
+    
+    def entries():
+        for batch_id, duplicates, cache_keys in parts:
+            for result in client.messages.batches.results(batch_id):
+                if result.result.type == "succeeded":
+                    name = f"{result.custom_id}.md"
+                    translation = result.result.message.content[0].text
+                    if cache_keys and name in cache_keys:
+                        cached[cache_keys[name]] = translation
+                    for filename in [name] + (duplicates or {}).get(name, []):
+                        yield filename, translation
+    
+    count = _write_archive(archive_path, entries())
+    TranslationCache().put_many("claude", batch_model("claude"), cached)
+    return count
+
+
+def claude_download_results(
+    batch_id: str,
+    output_dir: Path,
+    duplicates: Optional[Dict[str, List[str]]] = None,
+    cache_keys: Optional[Dict[str, str]] = None
+) -> int:
+    """
+    Download Claude batch results (and write their duplicates).
+    
+    If output_dir ends in .tar or .ndjson, all results are written into
+    that single archive file instead of one .md file each. Results for
+    files listed in cache_keys are also added to the translation cache.
+    """
+    if output_dir.suffix in ARCHIVE_SUFFIXES:
+        return _claude_download_archive([(batch_id, duplicates, cache_keys)], output_dir)
     
-    for result in client.messages.batches.results(batch_id):
-        if result.result.type == "succeeded":
-            translation = result.result.message.content[0].text
-            output_path = output_dir / f"{result.custom_id}.md"
-            output_path.write_text(translation, encoding='utf-8')
-            count += 1
-            print(f"  Saved: {output_path.name}")
+    client = _claude_client()
+    cached = {}
     
+    output_dir.mkdir(parents=True, exist_ok=True)
+    log = _SavedLog()
+    
+    # Writes are independent, so they overlap on a pool while results stream in
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        futures = []
+        for result in client.messages.batches.results(batch_id):
+            if result.result.type == "succeeded":
+                translation = result.result.message.content[0].text
+                output_path = output_dir / f"{result.custom_id}.md"
+                copies = (duplicates or {}).get(output_path.name, [])
+                futures.append(executor.submit(
+                    _write_result, output_path, translation.encode('utf-8'), copies
+                ))
+                log.add(output_path.name)
+                if cache_keys and output_path.name in cache_keys:
+                    cached[cache_keys[output_path.name]] = translation
+        count = sum(future.result() for future in futures)
+    
+    TranslationCache().put_many("claude", batch_model("claude"), cached)
+    log.flush()
     return count
 
 
@@ -230,50 +571,184 @@ def claude_download_results(batch_id: str, output_dir: Path) -> int:
 # UNIFIED INTERFACE
 # =============================================================================
 
-def submit_batch(input_dir: str, engine: str = "openai") -> str:
+# Requests per submitted batch, well under the provider caps
+# (OpenAI 50K per file, Anthropic 100K per batch)
+MAX_BATCH_REQUESTS = 10_000
+
+# Source bytes per batch, leaving room for prompts under the JSONL size
+# limits (OpenAI 200MB per file, Anthropic 256MB per batch)
+MAX_BATCH_BYTES = 100 * 1024 * 1024
+
+# Large directories become several batches, joined into one id
+BATCH_ID_SEPARATOR = ","
+
+
+def pack_batches(files: List[Path], sizes: Dict[str, int]) -> List[List[Path]]:
+    """
+    Split files into as few batches as the limits allow, balanced by size.
+    
+    A batch finishes with its slowest request, so files go largest-first
+    to the lightest batch (LPT) instead of being cut by filename. Each
+    batch keeps filename order.
+    """
+    total = sum(sizes[f.name] for f in files)
+    count = max(1, -(-len(files) // MAX_BATCH_REQUESTS), -(-total // MAX_BATCH_BYTES))
+    if count == 1:
+        return [files]
+    
+    bins: List[List[Path]] = [[] for _ in range(count)]
+    heap = [(0, i) for i in range(count)]
+    for f in sorted(files, key=lambda f: sizes[f.name], reverse=True):
+        load, i = heapq.heappop(heap)
+        bins[i].append(f)
+        # Full bins drop out; count * MAX_BATCH_REQUESTS >= len(files)
+        if len(bins[i]) < MAX_BATCH_REQUESTS:
+            heapq.heappush(heap, (load + sizes[f.name], i))
+    return [sorted(b) for b in bins if b]
+
+
+def _submit_chunk(
+    files: List[Path],
+    start: int,
+    engine: str,
+    batch_dir: Path,
+    duplicates: Dict[str, List[str]],
+    cache_keys: Dict[str, str],
+    prompts: Dict[str, str]
+) -> str:
+    """Submit one chunk of files as its own batch. Returns its batch_id."""
+    if engine == "openai":
+        jsonl_path = openai_create_batch_file(files, batch_dir, start, prompts)
+        batch_id = openai_submit_batch(jsonl_path)
+        
+        # Save file mapping
+        mapping = {f"request-{start + i}-{f.stem}": f.name for i, f in enumerate(files)}
+        mapping_path = batch_dir / f"{batch_id}_mapping.json"
+        mapping_path.write_bytes(_dumps(mapping))
+        
+    else:
+        requests = claude_create_batch_requests(files, prompts)
+        batch_id = claude_submit_batch(requests)
+    
+    names = {f.name for f in files}
+    chunk_duplicates = {name: dups for name, dups in duplicates.items() if name in names}
+    if chunk_duplicates:
+        duplicates_path = batch_dir / f"{batch_id}_duplicates.json"
+        duplicates_path.write_bytes(_dumps(chunk_duplicates))
+    
+    # Cache keys, so download_results can store the translations
+    chunk_keys = {f.name: cache_keys[f.name] for f in files}
+    keys_path = batch_dir / f"{batch_id}_cache_keys.json"
+    keys_path.write_bytes(_dumps(chunk_keys))
+    
+    return batch_id
+
+
+def submit_batch(input_dir: str, engine: str = "openai", output_dir: Optional[str] = None) -> str:
     """
     Submit batch translation job.
     
+    Directories over MAX_BATCH_REQUESTS files or MAX_BATCH_BYTES are split
+    into size-balanced batches (pack_batches), submitted in parallel; the
+    returned id joins theirs with commas and is accepted by check_status,
+    wait_for_batch and download_results.
+    
+    If output_dir is given, files already in the translation cache are
+    written there directly and left out of the batch.
+    
     Args:
         input_dir: Directory with .md files to translate
         engine: "openai" or "claude"
+        output_dir: Where cached translations are written
     
     Returns:
-        batch_id for status checking
+        batch_id for status checking ("" if every file was cached)
     """
+    if engine not in ("openai", "claude"):
+        raise ValueError(f"Unknown engine: {engine}")
+    
     input_path = Path(input_dir)
-    files = sorted(input_path.glob("*.md"))
+    manifest = file_manifest(input_path)
+    files = list(manifest)
     
     if not files:
         raise ValueError(f"No .md files in {input_dir}")
     
+    # Identical files are translated once and copied back on download
+    files, duplicates, _ = dedupe_files(files, {f: digest for f, (_, digest) in manifest.items()})
+    skipped = sum(len(names) for names in duplicates.values())
+    
+    # Keyed on the built prompts, which embed the current glossary
+    prompts, cache_keys = build_batch_prompts(files, engine)
+    
+    if output_dir:
+        cache = TranslationCache()
+        hits = cache.get_many(cache_keys.values())
+        cached_files = [f for f in files if cache_keys[f.name] in hits]
+        if cached_files:
+            out = Path(output_dir)
+            out.mkdir(parents=True, exist_ok=True)
+            for f in cached_files:
+                copies = duplicates.get(f.name, [])
+                _write_result(out / f.name, hits[cache_keys[f.name]].encode('utf-8'), copies)
+            print(f"Reused {len(cached_files)} cached translations")
+            files = [f for f in files if cache_keys[f.name] not in hits]
+        if not files:
+            return ""
+    
     print(f"Submitting {len(files)} files for batch translation ({engine})")
+    if skipped:
+        print(f"Skipping {skipped} files with duplicate content")
     print(f"💰 50% discount applies!")
     
-    if engine == "openai":
-        # Create temp dir for batch files
-        batch_dir = input_path.parent / ".batch"
-        batch_dir.mkdir(exist_ok=True)
-        
-        jsonl_path = openai_create_batch_file(files, batch_dir)
-        batch_id = openai_submit_batch(jsonl_path)
-        
-        # Save file mapping
-        mapping = {f"request-{i}-{f.stem}": f.name for i, f in enumerate(files)}
-        mapping_path = batch_dir / f"{batch_id}_mapping.json"
-        mapping_path.write_text(json.dumps(mapping), encoding='utf-8')
-        
-    elif engine == "claude":
-        requests = claude_create_batch_requests(files)
-        batch_id = claude_submit_batch(requests)
-    else:
-        raise ValueError(f"Unknown engine: {engine}")
+    # Create temp dir for batch files
+    batch_dir = input_path.parent / ".batch"
+    batch_dir.mkdir(exist_ok=True)
+    
+    chunks = pack_batches(files, {f.name: manifest[f][0] for f in files})
+    # Request numbers continue across chunks so custom_ids stay unique
+    starts = [0]
+    for chunk in chunks[:-1]:
+        starts.append(starts[-1] + len(chunk))
+    
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        batch_ids = list(executor.map(
+            lambda chunk, start: _submit_chunk(
+                chunk, start, engine, batch_dir, duplicates, cache_keys, prompts,
+            ),
+            chunks,
+            starts,
+        ))
+    
+    return BATCH_ID_SEPARATOR.join(batch_ids)
+
+
+def _combine_status(batch_id: str, statuses: List[Dict]) -> Dict:
+    """Fold the statuses of a batch group into one."""
+    states = [s["status"] for s in statuses]
+    pending = [state for state in states if state not in BATCH_DONE_STATUSES]
+    failed = [state for state in states if state not in BATCH_SUCCESS_STATUSES]
+    
+    counts: Dict[str, int] = {}
+    for s in statuses:
+        part = s.get("request_counts") or {}
+        for key, value in (part if isinstance(part, dict) else vars(part)).items():
+            if isinstance(value, int):
+                counts[key] = counts.get(key, 0) + value
     
-    return batch_id
+    return {
+        "id": batch_id,
+        "status": (pending or failed or states)[0],
+        "batches": statuses,
+        "request_counts": counts,
+    }
 
 
 def check_status(batch_id: str, engine: str = "openai") -> Dict:
-    """Check batch job status."""
+    """Check batch job status (combined over a comma-joined batch group)."""
+    if BATCH_ID_SEPARATOR in batch_id:
+        statuses = [check_status(part, engine) for part in batch_id.split(BATCH_ID_SEPARATOR)]
+        return _combine_status(batch_id, statuses)
     if engine == "openai":
         return openai_check_batch(batch_id)
     elif engine == "claude":
@@ -282,24 +757,84 @@ def check_status(batch_id: str, engine: str = "openai") -> Dict:
         raise ValueError(f"Unknown engine: {engine}")
 
 
+# Terminal batch states (OpenAI: completed/failed/expired/cancelled, Anthropic: ended)
+BATCH_DONE_STATUSES = {"completed", "failed", "expired", "cancelled", "ended"}
+BATCH_SUCCESS_STATUSES = {"completed", "ended"}
+
+
+def wait_for_batch(
+    batch_id: str,
+    engine: str = "openai",
+    max_interval: float = 600.0,
+    max_wait: float = 24 * 3600
+) -> Dict:
+    """
+    Poll check_status until the batch reaches a terminal state.
+    
+    The interval doubles after every check (1s, 2s, 4s, ...) up to
+    max_interval, so short batches finish fast without hammering the API.
+    Gives up after max_wait seconds (the providers' 24h window).
+    
+    Returns:
+        Final status dict (the last one seen if max_wait ran out)
+    """
+    deadline = time.monotonic() + max_wait
+    attempt = 0
+    while True:
+        status = check_status(batch_id, engine)
+        if status["status"] in BATCH_DONE_STATUSES:
+            return status
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            print(f"  Gave up waiting after {max_wait:.0f}s (status: {status['status']})")
+            return status
+        delay = min(max_interval, 2 ** attempt, remaining)
+        print(f"  Status: {status['status']} (next check in {delay:.0f}s)")
+        time.sleep(delay)
+        attempt += 1
+
+
+def _load_batch_json(batch_dir: Optional[Path], batch_id: str, kind: str) -> Dict:
+    """{batch_id}_{kind}.json saved at submit time, or {} if missing."""
+    path = batch_dir / f"{batch_id}_{kind}.json" if batch_dir else None
+    if path and path.exists():
+        return _loads(path.read_bytes())
+    return {}
+
+
 def download_results(batch_id: str, output_dir: str, engine: str = "openai", input_dir: str = None) -> int:
-    """Download completed batch results."""
+    """
+    Download completed batch results (every batch of a comma-joined group).
+    
+    For claude, a .tar or .ndjson output_dir receives the results of every
+    batch in the group in one archive.
+    """
     output_path = Path(output_dir)
+    batch_dir = Path(input_dir).parent / ".batch" if input_dir else None
+    
+    if BATCH_ID_SEPARATOR in batch_id:
+        part_ids = batch_id.split(BATCH_ID_SEPARATOR)
+        if engine == "claude" and output_path.suffix in ARCHIVE_SUFFIXES:
+            parts = [
+                (part,
+                 _load_batch_json(batch_dir, part, "duplicates"),
+                 _load_batch_json(batch_dir, part, "cache_keys"))
+                for part in part_ids
+            ]
+            return _claude_download_archive(parts, output_path)
+        return sum(download_results(part, output_dir, engine, input_dir) for part in part_ids)
+    
+    # Files skipped at submit time for repeating another file's content
+    duplicates = _load_batch_json(batch_dir, batch_id, "duplicates")
+    
+    # Translation cache keys of the submitted files
+    cache_keys = _load_batch_json(batch_dir, batch_id, "cache_keys")
     
     if engine == "openai":
-        # Load file mapping
-        if input_dir:
-            mapping_path = Path(input_dir).parent / ".batch" / f"{batch_id}_mapping.json"
-            if mapping_path.exists():
-                file_mapping = json.loads(mapping_path.read_text())
-            else:
-                file_mapping = {}
-        else:
-            file_mapping = {}
-        
-        return openai_download_results(batch_id, output_path, file_mapping)
+        file_mapping = _load_batch_json(batch_dir, batch_id, "mapping")
+        return openai_download_results(batch_id, output_path, file_mapping, duplicates, cache_keys)
     elif engine == "claude":
-        return claude_download_results(batch_id, output_path)
+        return claude_download_results(batch_id, output_path, duplicates, cache_keys)
     else:
         raise ValueError(f"Unknown engine: {engine}")
 
@@ -318,25 +853,36 @@ if __name__ == "__main__":
     submit_parser = subparsers.add_parser("submit", help="Submit batch job")
     submit_parser.add_argument("input_dir", help="Directory with .md files")
     submit_parser.add_argument("--engine", default="openai", choices=["openai", "claude"])
+    submit_parser.add_argument("--output-dir", help="Write cached translations here and skip them")
     
     # Status
     status_parser = subparsers.add_parser("status", help="Check batch status")
     status_parser.add_argument("batch_id", help="Batch ID")
     status_parser.add_argument("--engine", default="openai", choices=["openai", "claude"])
     
+    # Wait
+    wait_parser = subparsers.add_parser("wait", help="Wait until batch finishes")
+    wait_parser.add_argument("batch_id", help="Batch ID")
+    wait_parser.add_argument("--engine", default="openai", choices=["openai", "claude"])
+    wait_parser.add_argument("--max-interval", type=float, default=600.0, help="Longest wait between checks (seconds)")
+    wait_parser.add_argument("--max-wait", type=float, default=24 * 3600, help="Give up after this many seconds")
+    
     # Download
     download_parser = subparsers.add_parser("download", help="Download results")
     download_parser.add_argument("batch_id", help="Batch ID")
-    download_parser.add_argument("output_dir", help="Output directory")
+    download_parser.add_argument("output_dir", help="Output directory (claude: or a .tar/.ndjson file)")
     download_parser.add_argument("--engine", default="openai", choices=["openai", "claude"])
     download_parser.add_argument("--input-dir", help="Original input dir (for file mapping)")
     
     args = parser.parse_args()
     
     if args.command == "submit":
-        batch_id = submit_batch(args.input_dir, args.engine)
-        print(f"\n✅ Batch submitted: {batch_id}")
-        print(f"Check status with: python -m lib.translators.batch_translator status {batch_id}")
+        batch_id = submit_batch(args.input_dir, args.engine, args.output_dir)
+        if not batch_id:
+            print("\n✅ All files served from the translation cache")
+        else:
+            print(f"\n✅ Batch submitted: {batch_id}")
+            print(f"Check status with: python -m lib.translators.batch_translator status {batch_id}")
         
     elif args.command == "status":
         status = check_status(args.batch_id, args.engine)
@@ -346,6 +892,10 @@ if __name__ == "__main__":
         if 'request_counts' in status:
             print(f"  Requests: {status['request_counts']}")
         
+    elif args.command == "wait":
+        status = wait_for_batch(args.batch_id, args.engine, args.max_interval, args.max_wait)
+        print(f"\nBatch finished: {status['status']}")
+        
     elif args.command == "download":
         count = download_results(args.batch_id, args.output_dir, args.engine, args.input_dir)
         print(f"\n✅ Downloaded {count} files to {args.output_dir}")
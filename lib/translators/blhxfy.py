@@ -3,10 +3,13 @@ BLHXFY Translation utilities.
 Loads and applies official BLHXFY translation mappings.
 """
 
+import io
 import os
+import atexit
+import re
 import csv
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, List, Optional, Tuple
 
 try:
     from ..utils.config import LOCAL_BLHXFY_ETC, SCRIPT_DIR
@@ -17,6 +20,77 @@ except ImportError:
 
 logger = logging.getLogger("gbf-wiki.translator")
 
+# Hiragana: \u3040-\u309f, Katakana: \u30a0-\u30ff
+_JP_RE = re.compile(r'[\u3040-\u309f\u30a0-\u30ff]')
+_ASCII_RE = re.compile(r'[a-zA-Z]')
+
+
+def _trie_regex(words) -> str:
+    """
+    Regex matching any of words, nested as a character trie.
+    
+    The engine walks the trie instead of trying every word at each
+    position, and optional tails are greedy, so the longest word wins.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+    
+    def build(node: dict) -> str:
+        branches = [re.escape(ch) + build(child) for ch, child in sorted(node.items()) if ch]
+        if not branches:
+            return ''
+        if '' in node:
+            return '(?:' + '|'.join(branches) + ')?'
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+    
+    return build(trie)
+
+
+def _build_replacer(*tables: Dict[str, str]) -> Callable[[str], str]:
+    """
+    One-pass replacement over several tables (earlier tables win on equal keys).
+    
+    Scans left to right and replaces the longest key at each position,
+    instead of one full str.replace pass per key.
+    """
+    mapping: Dict[str, str] = {}
+    for table in tables:
+        for original, replacement in table.items():
+            if original:
+                mapping.setdefault(original, replacement)
+    if not mapping:
+        return lambda text: text
+    pattern = re.compile(_trie_regex(mapping))
+    return lambda text: pattern.sub(lambda m: mapping[m.group()], text)
+
+
+# (path, encoding, dict rows, mtime_ns, size) -> parsed rows
+_CSV_CACHE: Dict[Tuple[str, str, bool, int, int], list] = {}
+
+
+def _read_csv_cached(path: str, use_dictreader: bool, encoding: str = 'utf-8') -> list:
+    """
+    Rows of a CSV file, parsed once per file version.
+    
+    Rows are shared between translator instances and must not be modified.
+    """
+    st = os.stat(path)
+    key = (path, encoding, use_dictreader, st.st_mtime_ns, st.st_size)
+    rows = _CSV_CACHE.get(key)
+    if rows is None:
+        # One bulk read; csv then parses from memory
+        with open(path, 'r', encoding=encoding) as f:
+            buf = io.StringIO(f.read())
+        rows = list(csv.DictReader(buf) if use_dictreader else csv.reader(buf))
+        _CSV_CACHE[key] = rows
+    return rows
+
 
 class BLHXFYTranslator:
     """
@@ -30,7 +104,31 @@ class BLHXFYTranslator:
         self.noun_fixes: Dict[str, str] = {}
         self.caiyun_prefixes: Dict[str, str] = {}
         self.npc_en_file_path: Optional[str] = None
+        # (len(npc_names), keys, lowercased keys) for find_similar_names
+        self._similar_index: Optional[Tuple[int, List[str], List[str]]] = None
+        # key.lower() -> (load position, first such key), for lookup_cn_name
+        self._npc_names_lower: Dict[str, Tuple[int, str]] = {}
+        # _strip_suffix(key).lower() -> first such key
+        self._npc_names_base_lower: Dict[str, str] = {}
+        # JP key without ・/＝/spaces -> CN, for lookup_jp_name
+        self._npc_names_jp_clean: Dict[str, str] = {}
+        # JP key lowercased, as-is and with ・/＝ as spaces -> CN,
+        # for find_cn_from_jp_mapping
+        self._npc_names_jp_lower: Dict[str, str] = {}
+        # CN -> EN inverse of npc_names, cleared on add_en_mapping
+        self._cn_to_en_cache: Optional[Dict[str, str]] = None
+        # name -> smart_lookup result (None if not found), cleared on add_en_mapping
+        self._smart_cache: Dict[str, Optional[str]] = {}
+        # Compiled term replacers, built on first use
+        self._prefix_replacer: Optional[Callable[[str], str]] = None
+        self._pre_replacer: Optional[Callable[[str], str]] = None
+        self._post_replacer: Optional[Callable[[str], str]] = None
+        # Learned mappings not yet appended to npc_en_file_path
+        self._pending_en_writes: List[Tuple[str, str]] = []
+        self._pending_threshold = 32
         self._load_translations()
+        self._index_npc_names()
+        atexit.register(self.flush_en_mappings)
     
     def _first_existing(self, paths):
         for p in paths:
@@ -46,25 +144,21 @@ class BLHXFYTranslator:
         ])
         if npc_file:
             self.npc_en_file_path = npc_file
-            with open(npc_file, 'r', encoding='utf-8-sig') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row.get('name') and row.get('trans'):
-                        self.npc_names[row['name']] = row['trans']
+            for row in _read_csv_cached(npc_file, True, 'utf-8-sig'):
+                if row.get('name') and row.get('trans'):
+                    self.npc_names[row['name']] = row['trans']
             logger.info(f"Loaded {len(self.npc_names)} EN->CN NPC names")
         
         # Load added EN -> CN mappings (generated)
         added_file = os.path.join(LOCAL_BLHXFY_ETC, "added_en_mapping.csv")
         if os.path.exists(added_file):
             added_count = 0
-            with open(added_file, 'r', encoding='utf-8-sig') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    name = row.get('name', '').strip()
-                    trans = row.get('trans', '').strip()
-                    if name and trans and name not in self.npc_names:
-                        self.npc_names[name] = trans
-                        added_count += 1
+            for row in _read_csv_cached(added_file, True, 'utf-8-sig'):
+                name = row.get('name', '').strip()
+                trans = row.get('trans', '').strip()
+                if name and trans and name not in self.npc_names:
+                    self.npc_names[name] = trans
+                    added_count += 1
             logger.info(f"Loaded {added_count} added EN->CN mappings")
         
         # Load JP -> CN mappings
@@ -72,23 +166,27 @@ class BLHXFYTranslator:
             os.path.join(LOCAL_BLHXFY_ETC, "npc-name-jp.csv"),
         ])
         if jp_file:
-            with open(jp_file, 'r', encoding='utf-8-sig') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    if row.get('name') and row.get('trans'):
-                        self.npc_names_jp[row['name']] = row['trans']
+            for row in _read_csv_cached(jp_file, True, 'utf-8-sig'):
+                if row.get('name') and row.get('trans'):
+                    self.npc_names_jp[row['name']] = row['trans']
             logger.info(f"Loaded {len(self.npc_names_jp)} JP->CN NPC names")
         
+        # Normalized JP keys, first entry wins (as the old linear scans did)
+        for jp, cn in self.npc_names_jp.items():
+            clean = jp.replace('・', '').replace('＝', '').replace(' ', '')
+            self._npc_names_jp_clean.setdefault(clean, cn)
+            self._npc_names_jp_lower.setdefault(jp.lower(), cn)
+            normalized = jp.replace('・', ' ').replace('＝', ' ').lower()
+            self._npc_names_jp_lower.setdefault(normalized, cn)
+        
         noun_file = self._first_existing([
             os.path.join(LOCAL_BLHXFY_ETC, "noun.csv"),
             os.path.join(SCRIPT_DIR, "blhxfy_noun.csv"),
         ])
         if noun_file:
-            with open(noun_file, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                for row in reader:
-                    if len(row) >= 2 and row[0] and row[1]:
-                        self.nouns[row[0]] = row[1]
+            for row in _read_csv_cached(noun_file, False):
+                if len(row) >= 2 and row[0] and row[1]:
+                    self.nouns[row[0]] = row[1]
             logger.info(f"Loaded {len(self.nouns)} nouns")
         
         fix_file = self._first_existing([
@@ -96,11 +194,9 @@ class BLHXFYTranslator:
             os.path.join(SCRIPT_DIR, "blhxfy_noun_fix.csv"),
         ])
         if fix_file:
-            with open(fix_file, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                for row in reader:
-                    if len(row) >= 2 and row[0] and row[1]:
-                        self.noun_fixes[row[0]] = row[1]
+            for row in _read_csv_cached(fix_file, False):
+                if len(row) >= 2 and row[0] and row[1]:
+                    self.noun_fixes[row[0]] = row[1]
             logger.info(f"Loaded {len(self.noun_fixes)} fixes")
         
         # Load caiyun-prefix mappings
@@ -108,44 +204,92 @@ class BLHXFYTranslator:
             os.path.join(LOCAL_BLHXFY_ETC, "caiyun-prefix.csv"),
         ])
         if prefix_file:
-            with open(prefix_file, 'r', encoding='utf-8') as f:
-                reader = csv.reader(f)
-                next(reader, None)
-                for row in reader:
-                    if len(row) >= 2 and row[0] and row[1]:
-                        self.caiyun_prefixes[row[0]] = row[1]
+            # First row is the header
+            for row in _read_csv_cached(prefix_file, False)[1:]:
+                if len(row) >= 2 and row[0] and row[1]:
+                    self.caiyun_prefixes[row[0]] = row[1]
             logger.info(f"Loaded {len(self.caiyun_prefixes)} caiyun prefixes")
     
+    def _index_npc_name(self, key: str, position: int):
+        """Add one EN key to the case-insensitive lookup indexes."""
+        self._npc_names_lower.setdefault(key.lower(), (position, key))
+        self._npc_names_base_lower.setdefault(self._strip_suffix(key).lower(), key)
+    
+    def _index_npc_names(self):
+        """Build the case-insensitive indexes over npc_names (first key wins)."""
+        self._npc_names_lower = {}
+        self._npc_names_base_lower = {}
+        for position, key in enumerate(self.npc_names):
+            self._index_npc_name(key, position)
+    
     def add_en_mapping(self, en_name: str, cn_name: str) -> bool:
-        """Add a new EN->CN mapping and persist to file."""
+        """Add a new EN->CN mapping and queue it for the EN name file."""
         if not en_name or not cn_name:
             return False
         
+        if en_name not in self.npc_names:
+            self._index_npc_name(en_name, len(self.npc_names))
         self.npc_names[en_name] = cn_name
+        self._pre_replacer = None
+        self._smart_cache.clear()
+        self._cn_to_en_cache = None
         
         if self.npc_en_file_path and os.path.exists(self.npc_en_file_path):
-            try:
-                with open(self.npc_en_file_path, 'a', encoding='utf-8', newline='') as f:
-                    f.write(f"{en_name},{cn_name},,\n")
-                logger.info(f"Added mapping: {en_name} -> {cn_name}")
-                return True
-            except Exception as e:
-                logger.error(f"Failed to persist mapping: {e}")
+            # Appended in blocks; see flush_en_mappings
+            self._pending_en_writes.append((en_name, cn_name))
+            logger.info(f"Added mapping: {en_name} -> {cn_name}")
+            if len(self._pending_en_writes) >= self._pending_threshold:
+                return self.flush_en_mappings()
+            return True
         return False
     
+    def flush_en_mappings(self) -> bool:
+        """Append pending learned mappings to the EN name file in one write."""
+        if not self._pending_en_writes:
+            return True
+        lines = "".join(f"{en},{cn},,\n" for en, cn in self._pending_en_writes)
+        try:
+            with open(self.npc_en_file_path, 'a', encoding='utf-8', newline='') as f:
+                f.write(lines)
+        except Exception as e:
+            logger.error(f"Failed to persist mappings: {e}")
+            return False
+        self._pending_en_writes.clear()
+        return True
+    
+    def find_similar_names(self, name: str, limit: int = 5) -> List[str]:
+        """EN names containing `name` (case-insensitive), in load order."""
+        # Keys are only ever added, so the size tells when to rebuild
+        if self._similar_index is None or self._similar_index[0] != len(self.npc_names):
+            keys = list(self.npc_names)
+            self._similar_index = (len(keys), keys, [k.lower() for k in keys])
+        _, keys, lowered = self._similar_index
+        
+        needle = name.lower()
+        found = []
+        for key, key_lower in zip(keys, lowered):
+            if needle in key_lower:
+                found.append(key)
+                if len(found) >= limit:
+                    break
+        return found
+    
+    # Character variant suffixes; none ends another, so at most one matches
+    _VARIANT_SUFFIXES = (
+        ' (Event)', ' (Summer)', ' (Grand)', ' (Yukata)', ' (Halloween)',
+        ' (Holiday)', ' (Valentine)', ' (Dark)', ' (Light)', ' (SR)',
+        ' (Promo)', ' (Fire)', ' (Water)', ' (Earth)', ' (Wind)',
+    )
+    
     def _strip_suffix(self, name: str) -> str:
         """Remove common character variant suffixes."""
-        suffixes = [
-            ' (Event)', ' (Summer)', ' (Grand)', ' (Yukata)', ' (Halloween)',
-            ' (Holiday)', ' (Valentine)', ' (Dark)', ' (Light)', ' (SR)',
-            ' (Promo)', ' (Fire)', ' (Water)', ' (Earth)', ' (Wind)',
-        ]
-        result = name
-        for suffix in suffixes:
-            if result.endswith(suffix):
-                result = result[:-len(suffix)]
-                break
-        return result
+        # One C-level check covers the usual no-suffix case
+        if not name.endswith(self._VARIANT_SUFFIXES):
+            return name
+        for suffix in self._VARIANT_SUFFIXES:
+            if name.endswith(suffix):
+                return name[:-len(suffix)]
+        return name
     
     def lookup_cn_name(self, en_name: str) -> Optional[str]:
         """
@@ -167,19 +311,20 @@ class BLHXFYTranslator:
         if base_name != en_name and base_name in self.npc_names:
             return self.npc_names[base_name]
         
-        # 3. Case-insensitive match
-        en_lower = en_name.lower()
-        base_lower = base_name.lower()
-        for key, cn in self.npc_names.items():
-            key_lower = key.lower()
-            if key_lower == en_lower or key_lower == base_lower:
-                return cn
+        # 3. Case-insensitive match (whichever key was loaded first)
+        matches = [
+            hit for hit in (
+                self._npc_names_lower.get(en_name.lower()),
+                self._npc_names_lower.get(base_name.lower()),
+            ) if hit
+        ]
+        if matches:
+            return self.npc_names[min(matches)[1]]
         
         # 4. Partial match (for names with extra context)
-        for key, cn in self.npc_names.items():
-            key_base = self._strip_suffix(key)
-            if key_base.lower() == base_lower:
-                return cn
+        key = self._npc_names_base_lower.get(base_name.lower())
+        if key is not None:
+            return self.npc_names[key]
         
         return None
     
@@ -189,29 +334,17 @@ class BLHXFYTranslator:
         This is a heuristic - we check if the EN name appears similar to any JP entry.
         """
         base_name = self._strip_suffix(en_name)
-        base_lower = base_name.lower()
-        
-        for jp, cn in self.npc_names_jp.items():
-            # Case-insensitive match
-            if base_lower == jp.lower():
-                return cn
-            # Check if JP name is romanization of EN name
-            jp_normalized = jp.replace('・', ' ').replace('＝', ' ')
-            if base_lower == jp_normalized.lower():
-                return cn
-        return None
+        # Case-insensitive match, or JP name with ・/＝ read as spaces
+        return self._npc_names_jp_lower.get(base_name.lower())
     
     def _is_japanese(self, text: str) -> bool:
         """Check if text contains Japanese characters (hiragana/katakana)."""
-        import re
-        # Hiragana: \u3040-\u309f, Katakana: \u30a0-\u30ff
-        return bool(re.search(r'[\u3040-\u309f\u30a0-\u30ff]', text))
+        return bool(_JP_RE.search(text))
     
     def _is_english(self, text: str) -> bool:
         """Check if text is primarily ASCII/English."""
-        import re
         # Check if mostly ASCII letters
-        ascii_chars = len(re.findall(r'[a-zA-Z]', text))
+        ascii_chars = len(_ASCII_RE.findall(text))
         return ascii_chars > len(text) * 0.5
     
     def lookup_jp_name(self, jp_name: str) -> Optional[str]:
@@ -223,14 +356,10 @@ class BLHXFYTranslator:
         if jp_name in self.npc_names_jp:
             return self.npc_names_jp[jp_name]
         
-        # Try without separators
+        # Try without separators (chained replace beats str.translate on
+        # strings this short: a replace with nothing to match is nearly free)
         jp_clean = jp_name.replace('・', '').replace('＝', '').replace(' ', '')
-        for key, cn in self.npc_names_jp.items():
-            key_clean = key.replace('・', '').replace('＝', '').replace(' ', '')
-            if key_clean == jp_clean:
-                return cn
-        
-        return None
+        return self._npc_names_jp_clean.get(jp_clean)
     
     def smart_lookup(self, name: str, fallback_format: bool = False) -> Optional[str]:
         """
@@ -248,6 +377,20 @@ class BLHXFYTranslator:
         if not name:
             return None
         
+        # Speakers repeat throughout a story, so results are memoized
+        if name in self._smart_cache:
+            result = self._smart_cache[name]
+        else:
+            result = self._smart_cache[name] = self._resolve_name(name)
+        
+        # Not found - return fallback format if requested
+        if result is None and fallback_format:
+            return name  # Keep original, name_fixer will handle it
+        
+        return result
+    
+    def _resolve_name(self, name: str) -> Optional[str]:
+        """Uncached smart_lookup: try the mapping matching the script first."""
         # Detect language and use appropriate mapping
         if self._is_japanese(name):
             # Japanese name -> JP mapping
@@ -270,10 +413,6 @@ class BLHXFYTranslator:
         if result:
             return result
         
-        # Not found - return fallback format if requested
-        if fallback_format:
-            return name  # Keep original, name_fixer will handle it
-        
         return None
     
     def translate_name_with_fallback(self, name: str) -> str:
@@ -285,33 +424,33 @@ class BLHXFYTranslator:
         return result if result else name
     
     def get_cn_to_en_mapping(self) -> Dict[str, str]:
-        return {cn: en for en, cn in self.npc_names.items()}
+        """CN -> EN names (shared cached dict, do not modify)."""
+        if self._cn_to_en_cache is None:
+            self._cn_to_en_cache = {cn: en for en, cn in self.npc_names.items()}
+        return self._cn_to_en_cache
     
     def get_en_to_cn_mapping(self) -> Dict[str, str]:
         return dict(self.npc_names)
     
     def apply_caiyun_prefix(self, text: str) -> str:
         """Apply Caiyun preprocessing (before translation)."""
-        for original, replacement in self.caiyun_prefixes.items():
-            text = text.replace(original, replacement)
-        return text
+        if self._prefix_replacer is None:
+            self._prefix_replacer = _build_replacer(self.caiyun_prefixes)
+        return self._prefix_replacer(text)
     
     def apply_pre_translation(self, text: str) -> str:
         """Apply terminology substitution (before translation)."""
-        # Apply caiyun-prefix first
-        text = self.apply_caiyun_prefix(text)
-        # Then apply noun replacements
-        for original, replacement in self.nouns.items():
-            text = text.replace(original, replacement)
-        for en, cn in self.npc_names.items():
-            text = text.replace(en, cn)
-        return text
+        # caiyun-prefix, then nouns, then NPC names take precedence on equal
+        # terms; the longest term wins where terms overlap
+        if self._pre_replacer is None:
+            self._pre_replacer = _build_replacer(self.caiyun_prefixes, self.nouns, self.npc_names)
+        return self._pre_replacer(text)
     
     def apply_post_translation(self, text: str) -> str:
         """Apply post-translation fixes."""
-        for wrong, correct in self.noun_fixes.items():
-            text = text.replace(wrong, correct)
-        return text
+        if self._post_replacer is None:
+            self._post_replacer = _build_replacer(self.noun_fixes)
+        return self._post_replacer(text)
     
     def apply_translation(self, text: str, phase: str = "pre") -> str:
         """
@@ -339,10 +478,11 @@ class BLHXFYTranslator:
     def resolve_character_name(self, query: str) -> Dict[str, Any]:
         cn_to_en = self.get_cn_to_en_mapping()
         
-        if query in cn_to_en:
+        official = cn_to_en.get(query)
+        if official is not None:
             return {
                 "original_query": query,
-                "official_name": cn_to_en[query],
+                "official_name": official,
                 "confidence": 0.98,
                 "source": "blhxfy_official"
             }
@@ -5,11 +5,17 @@ Full translation: titles, dialogue, narration, unmapped character names.
 Uses Caiyun API for machine translation.
 """
 import re
-import time
+import hashlib
 import requests
-from typing import List, Dict, Any, Set
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, List, Dict, Any, Optional, Set
 from pathlib import Path
 
+from .translation_cache import response_cache
+from ..utils.concurrency import RateLimiter
+
 try:
     from .blhxfy import translator
     from ..utils.config import CAIYUN_API_KEY, CAIYUN_TOKEN
@@ -22,9 +28,37 @@ except ImportError:
 # Caiyun API configuration
 CAIYUN_API = "http://api.interpreter.caiyunai.com/v1/translator"
 
+# Batches in flight at once, and request starts allowed per second
+CAIYUN_CONCURRENCY = 4
+CAIYUN_RPS = 3.0
+
+# Keep-alive session shared by all calls (and translate_batches threads);
+# translation POSTs are idempotent, so gateway errors are retried
+_session = requests.Session()
+_session.headers.update({'content-type': 'application/json'})
+_session.mount("http://", HTTPAdapter(
+    pool_connections=8,
+    pool_maxsize=8,
+    max_retries=Retry(
+        total=2,
+        backoff_factor=0.2,
+        status_forcelist=[502, 503, 504],
+        allowed_methods=frozenset({"POST"}),
+    ),
+))
+_session.mount("https://", _session.adapters["http://"])
+
+# Markdown line patterns used by translate_markdown
+_TITLE_RE = re.compile(r'^(#{1,6})\s+(.+)$')
+_DIALOGUE_RE = re.compile(r'\*\*([^:：]+)[：:]\*\*\s*(.+)')
+_CN_RE = re.compile(r'[\u4e00-\u9fff]')
+
 # Cache for translated speaker names (avoid repeat API calls)
 _speaker_cache: Dict[str, str] = {}
 
+# Final translate_speaker result per name (speakers repeat on every line)
+_resolved_speaker_cache: Dict[str, str] = {}
+
 
 def translate_texts(texts: List[str], source_lang: str = 'en') -> List[str]:
     """Call Caiyun API to translate text list."""
@@ -34,10 +68,7 @@ def translate_texts(texts: List[str], source_lang: str = 'en') -> List[str]:
     # Filter empty texts
     texts = [t if t else ' ' for t in texts]
     
-    headers = {
-        'content-type': 'application/json',
-        'x-authorization': f'token {CAIYUN_TOKEN}'
-    }
+    headers = {'x-authorization': f'token {CAIYUN_TOKEN}'}
     
     payload = {
         'source': texts,
@@ -47,7 +78,7 @@ def translate_texts(texts: List[str], source_lang: str = 'en') -> List[str]:
     }
     
     try:
-        response = requests.post(CAIYUN_API, json=payload, headers=headers, timeout=30)
+        response = _session.post(CAIYUN_API, json=payload, headers=headers, timeout=30)
         result = response.json()
         if 'target' in result:
             return result['target']
@@ -57,6 +88,61 @@ def translate_texts(texts: List[str], source_lang: str = 'en') -> List[str]:
     return texts  # Return original on failure
 
 
+def translate_batches(texts: List[str], source_lang: str = 'en', batch_size: int = 20,
+                      concurrency: int = CAIYUN_CONCURRENCY, rps: float = CAIYUN_RPS) -> List[str]:
+    """Translate texts in batches, several requests in flight, results in input order."""
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    limiter = RateLimiter(rps)
+    
+    def run(batch: List[str]) -> List[str]:
+        limiter.wait()
+        return translate_texts(batch, source_lang)
+    
+    results: List[List[str]] = [[] for _ in batches]
+    done = 0
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(run, batch): i for i, batch in enumerate(batches)}
+        for future in as_completed(futures):
+            i = futures[future]
+            results[i] = future.result()
+            done += len(batches[i])
+            print(f"Progress: {done}/{len(texts)}")
+    return [text for batch in results for text in batch]
+
+
+def translate_texts_cached(texts: List[str], source_lang: str = 'en',
+                           translate: Optional[Callable[[List[str], str], List[str]]] = None) -> List[str]:
+    """
+    translate_texts, served from the on-disk translation cache where possible.
+    
+    Only cache misses are passed to `translate` (default: translate_texts).
+    Results equal to their source are not stored, since that is what the
+    API call returns on failure.
+    """
+    if not texts:
+        return []
+    translate = translate or translate_texts
+    cache = response_cache()
+    if cache is None:
+        return translate(texts, source_lang)
+    model = f"{source_lang}2zh"
+    keys = [
+        cache.key("caiyun", model, hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest())
+        for text in texts
+    ]
+    found = cache.get_many(keys)
+    misses = [i for i, key in enumerate(keys) if key not in found]
+    if misses:
+        translated = translate([texts[i] for i in misses], source_lang)
+        new = {}
+        for i, result in zip(misses, translated):
+            if result and result != texts[i]:
+                new[keys[i]] = result
+            found.setdefault(keys[i], result)
+        cache.put_many("caiyun", model, new)
+    return [found.get(key, text) for key, text in zip(keys, texts)]
+
+
 def translate_speaker(name: str) -> str:
     """
     Translate character name with auto-learning.
@@ -68,8 +154,16 @@ def translate_speaker(name: str) -> str:
     4. Cache -> return if found
     5. API translation -> translate and add to EN mapping
     """
+    if name in _resolved_speaker_cache:
+        return _resolved_speaker_cache[name]
+    result = _resolved_speaker_cache[name] = _resolve_speaker(name)
+    return result
+
+
+def _resolve_speaker(name: str) -> str:
+    """Uncached translate_speaker."""
     # Already Chinese, return directly
-    if re.search(r'[\u4e00-\u9fff]', name):
+    if _CN_RE.search(name):
         return name
     
     # 1. Check EN->CN mapping
@@ -91,7 +185,7 @@ def translate_speaker(name: str) -> str:
     
     # 4. API translation
     print(f"API translating character name: {name}")
-    translated = translate_texts([name], 'en')
+    translated = translate_texts_cached([name], 'en')
     if translated and translated[0]:
         cn_result = translated[0]
         _speaker_cache[name] = cn_result
@@ -103,21 +197,30 @@ def translate_speaker(name: str) -> str:
     return name
 
 
-def translate_markdown(lines: List[str], source_lang: str = 'en', batch_size: int = 20) -> List[str]:
+def translate_markdown(lines: Iterable[str], source_lang: str = 'en', batch_size: int = 20,
+                       concurrency: int = CAIYUN_CONCURRENCY) -> List[str]:
     """
     Translate Markdown file content.
     
+    `lines` is read once, front to back, so an open file can be passed.
+    
     Handles:
     1. Titles (# ## ###)
     2. Dialogue (**Name:** text)
     3. Narration (*text*)
     4. Regular text paragraphs
     """
-    result_lines = []
+    # Output in input order; lines to translate hold None until filled in
+    result_lines: List[Optional[str]] = []
     to_translate = []  # (line_number, type, extra_info)
     translate_texts_list = []
     speakers_to_translate: Set[str] = set()
     
+    # Bound once; these run for every classified line
+    pre_translate = translator.apply_pre_translation
+    post_translate = translator.apply_post_translation
+    speaker_name = translator.translate_speaker_name
+    
     for i, line in enumerate(lines):
         stripped = line.strip()
         
@@ -126,48 +229,48 @@ def translate_markdown(lines: List[str], source_lang: str = 'en', batch_size: in
             result_lines.append(line)
             continue
         
-        # Title: # ## ### etc.
-        title_match = re.match(r'^(#{1,6})\s+(.+)$', stripped)
+        # Title: # ## ### etc. (prefix checks skip the regexes on most lines)
+        title_match = stripped[0] == '#' and _TITLE_RE.match(stripped)
         if title_match:
             level, title_text = title_match.groups()
-            preprocessed = translator.apply_translation(title_text, "pre")
+            preprocessed = pre_translate(title_text)
             translate_texts_list.append(preprocessed)
             to_translate.append((i, 'title', level))
-            result_lines.append(line)
+            result_lines.append(None)
             continue
         
         # Dialogue: **Speaker:** text or **Speaker：** text
-        dialogue_match = re.match(r'\*\*([^:：]+)[：:]\*\*\s*(.+)', stripped)
+        dialogue_match = stripped.startswith('**') and _DIALOGUE_RE.match(stripped)
         if dialogue_match:
             speaker, text = dialogue_match.groups()
             speaker = speaker.strip()
             
             # Collect character names that need translation
-            cn_speaker = translator.translate_speaker_name(speaker)
-            if cn_speaker == speaker and not re.search(r'[\u4e00-\u9fff]', speaker):
+            cn_speaker = speaker_name(speaker)
+            if cn_speaker == speaker and not _CN_RE.search(speaker):
                 speakers_to_translate.add(speaker)
             
-            preprocessed = translator.apply_translation(text, "pre")
+            preprocessed = pre_translate(text)
             translate_texts_list.append(preprocessed)
             to_translate.append((i, 'dialogue', speaker))
-            result_lines.append(line)
+            result_lines.append(None)
             continue
         
         # Narration: *text*
         if stripped.startswith('*') and stripped.endswith('*') and len(stripped) > 2:
             text = stripped[1:-1]
-            preprocessed = translator.apply_translation(text, "pre")
+            preprocessed = pre_translate(text)
             translate_texts_list.append(preprocessed)
             to_translate.append((i, 'narration', None))
-            result_lines.append(line)
+            result_lines.append(None)
             continue
         
         # Regular text paragraph (not empty, not special characters)
         if stripped and not stripped.startswith(('|', '-', '>', '`', '[')):
-            preprocessed = translator.apply_translation(stripped, "pre")
+            preprocessed = pre_translate(stripped)
             translate_texts_list.append(preprocessed)
             to_translate.append((i, 'text', None))
-            result_lines.append(line)
+            result_lines.append(None)
             continue
         
         # Other content unchanged
@@ -177,27 +280,28 @@ def translate_markdown(lines: List[str], source_lang: str = 'en', batch_size: in
     if speakers_to_translate:
         print(f"Translating {len(speakers_to_translate)} unmapped character names...")
         speaker_list = list(speakers_to_translate)
-        translated_speakers = translate_texts(speaker_list, source_lang)
+        translated_speakers = translate_texts_cached(speaker_list, source_lang)
         for orig, trans in zip(speaker_list, translated_speakers):
             if trans:
                 _speaker_cache[orig] = trans
+                # Drop a cached failure from an earlier file
+                _resolved_speaker_cache.pop(orig, None)
     
     # Batch translate content
     if translate_texts_list:
-        print(f"Translating {len(translate_texts_list)} lines...")
-        all_translations = []
-        
-        for i in range(0, len(translate_texts_list), batch_size):
-            batch = translate_texts_list[i:i+batch_size]
-            translations = translate_texts(batch, source_lang)
-            all_translations.extend(translations)
-            print(f"Progress: {min(i+batch_size, len(translate_texts_list))}/{len(translate_texts_list)}")
-            time.sleep(0.3)  # Rate limiting
+        # Short lines repeat a lot; send each distinct text once
+        unique_texts = list(dict.fromkeys(translate_texts_list))
+        print(f"Translating {len(translate_texts_list)} lines ({len(unique_texts)} unique)...")
+        translated_unique = dict(zip(unique_texts, translate_texts_cached(
+            unique_texts, source_lang,
+            lambda misses, lang: translate_batches(misses, lang, batch_size, concurrency),
+        )))
+        all_translations = [translated_unique.get(text, text) for text in translate_texts_list]
         
         # Post-process and replace
         for (idx, text_type, extra), translated in zip(to_translate, all_translations):
             # BLHXFY post-processing
-            final_text = translator.apply_translation(translated, "post")
+            final_text = post_translate(translated)
             
             if text_type == 'title':
                 level = extra
@@ -218,14 +322,15 @@ def translate_file(input_file: str, output_file: str, source_lang: str = 'en') -
     """Translate single Markdown file."""
     try:
         with open(input_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        translated = translate_markdown(lines, source_lang)
+            translated = translate_markdown(f, source_lang)
         
         Path(output_file).parent.mkdir(parents=True, exist_ok=True)
         with open(output_file, 'w', encoding='utf-8') as f:
             f.writelines(translated)
         
+        # Persist names learned from this file
+        translator.flush_en_mappings()
+        
         return {"status": "success", "input": input_file, "output": output_file}
     except Exception as e:
         return {"status": "error", "input": input_file, "error": str(e)}
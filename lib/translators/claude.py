@@ -14,20 +14,27 @@ Usage:
 
 from __future__ import annotations
 
-import re
 import json
 import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Literal, TypedDict, Union
 from pathlib import Path
 
 import anthropic
 
 from .prompts import (
+    cached_system,
+    extract_speakers,
     build_story_prompt_full,
     build_story_prompt_simple,
     build_jp_translate_prompt,
     build_simple_text_prompt,
 )
+from .translation_cache import response_cache
+from ..utils.concurrency import run_concurrently
+from ..utils.files import list_files
 from .voice_translator import (
     is_voice_table,
     translate_voice_table,
@@ -98,11 +105,6 @@ TranslationMode = Literal["replace", "prompt"]
 # UTILITIES
 # =============================================================================
 
-def extract_speakers(content: str) -> set:
-    """Extract character names from dialogue format **Name:**."""
-    return set(re.findall(r'\*\*([^*:]+):\*\*', content))
-
-
 def split_into_chunks(content: str, chunk_size: int = CHUNK_SIZE) -> List[str]:
     """
     Split content into chunks at scene boundaries (## headings).
@@ -111,11 +113,12 @@ def split_into_chunks(content: str, chunk_size: int = CHUNK_SIZE) -> List[str]:
     Subsequent chunks contain ONLY content, no headers.
     This prevents duplicate headers and wasted API costs.
     """
-    lines = content.split('\n')
-    
-    if len(lines) <= chunk_size:
+    # Most files fit in one chunk; count lines without building the list
+    if content.count('\n') < chunk_size:
         return [content]
     
+    lines = content.split('\n')
+    
     # Extract header (lines before first ## heading or content)
     header_lines = []
     content_start = 0
@@ -185,38 +188,104 @@ def split_into_chunks(content: str, chunk_size: int = CHUNK_SIZE) -> List[str]:
 # CORE TRANSLATION
 # =============================================================================
 
+# Claude requests in flight at once across every thread (files and their
+# chunks), to stay under Anthropic's rate limits
+MAX_REQUESTS_IN_FLIGHT = 4
+_request_slots = threading.BoundedSemaphore(MAX_REQUESTS_IN_FLIGHT)
+
+# Retries after a 429, waiting RATE_LIMIT_BACKOFF * 2**attempt seconds
+RATE_LIMIT_RETRIES = 5
+RATE_LIMIT_BACKOFF = 2.0
+
+
+def _create_message(content: str, prompt: str):
+    """
+    One messages.create call, holding a request slot.
+    
+    Rate-limited calls are retried with exponential backoff; once the
+    retries run out a RuntimeError is raised, so the file is reported as
+    failed instead of keeping its source text.
+    """
+    for attempt in range(RATE_LIMIT_RETRIES + 1):
+        try:
+            with _request_slots:
+                return client.messages.create(
+                    model=CLAUDE_MODEL,
+                    max_tokens=MAX_TOKENS,
+                    temperature=0.1,
+                    system=cached_system(prompt),
+                    messages=[{"role": "user", "content": content}]
+                )
+        except anthropic.RateLimitError as e:
+            if attempt == RATE_LIMIT_RETRIES:
+                logger.error(f"Rate limited, giving up after {attempt + 1} attempts: {e}")
+                raise RuntimeError(f"Claude API rate limit: {e}")
+            delay = RATE_LIMIT_BACKOFF * 2 ** attempt
+            logger.warning(f"Rate limited, retrying in {delay:.0f}s: {e}")
+            time.sleep(delay)
+
+
 def translate_chunk(content: str, prompt: str) -> str:
     """Translate a single chunk using Claude API."""
     if client is None:
         raise RuntimeError("Claude client not initialized. Check CLAUDE_API_KEY.")
     
+    # Identical prompt + chunk was translated before (re-runs, shared scenes)
+    cache = response_cache()
+    key = cache.prompt_key("claude", CLAUDE_MODEL, prompt, content) if cache else None
+    if key:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+    
     try:
-        response = client.messages.create(
-            model=CLAUDE_MODEL,
-            max_tokens=MAX_TOKENS,
-            temperature=0.1,
-            system=prompt,
-            messages=[{"role": "user", "content": content}]
+        response = _create_message(content, prompt)
+        logger.debug(
+            f"Prompt cache: {getattr(response.usage, 'cache_read_input_tokens', 0)} read, "
+            f"{getattr(response.usage, 'cache_creation_input_tokens', 0)} written"
         )
-        return response.content[0].text
+        text = response.content[0].text
+        if key:
+            cache.put_many("claude", CLAUDE_MODEL, {key: text})
+        return text
     
     except anthropic.APIConnectionError as e:
         logger.error(f"Connection error: {e}")
         raise RuntimeError(f"Failed to connect to Claude API: {e}")
     
-    except anthropic.RateLimitError as e:
-        logger.warning(f"Rate limited: {e}")
-        return content
-    
     except anthropic.APIStatusError as e:
         logger.error(f"API error {e.status_code}: {e.message}")
         raise RuntimeError(f"Claude API error: {e.message}")
     
+    except RuntimeError:
+        raise
+    
     except Exception as e:
         logger.error(f"Unexpected error: {e}", exc_info=True)
         return content
 
 
+def _strip_leading_headers(translated: str) -> str:
+    """Remove headers (# or ##) and blank lines the model repeated at the top of a chunk."""
+    chunk_lines = translated.split('\n')
+    content_start = 0
+    for j, line in enumerate(chunk_lines):
+        # Skip all header lines (# or ##) and empty lines at the beginning
+        stripped = line.strip()
+        if stripped.startswith('# ') or stripped.startswith('## ') or stripped == '':
+            content_start = j + 1
+            continue
+        # Found first content line (dialogue, narration, etc.)
+        if stripped.startswith('*') or stripped.startswith('**'):
+            content_start = j
+            break
+        # Any other non-empty line is also content
+        if stripped:
+            content_start = j
+            break
+    return '\n'.join(chunk_lines[content_start:])
+
+
 def translate_story(content: str, mode: TranslationMode = DEFAULT_MODE) -> str:
     """Translate story/dialogue content."""
     lines = content.split('\n')
@@ -236,32 +305,17 @@ def translate_story(content: str, mode: TranslationMode = DEFAULT_MODE) -> str:
     chunks = split_into_chunks(processed)
     print(f"    Chunks: {len(chunks)}")
     
-    translated_chunks = []
-    for i, chunk in enumerate(chunks):
-        print(f"    [{i+1}/{len(chunks)}] Translating...")
-        translated = translate_chunk(chunk, prompt)
-        
-        # Remove duplicate headers from subsequent chunks (both # and ## headers)
-        if i > 0:
-            chunk_lines = translated.split('\n')
-            content_start = 0
-            for j, line in enumerate(chunk_lines):
-                # Skip all header lines (# or ##) and empty lines at the beginning
-                stripped = line.strip()
-                if stripped.startswith('# ') or stripped.startswith('## ') or stripped == '':
-                    content_start = j + 1
-                    continue
-                # Found first content line (dialogue, narration, etc.)
-                if stripped.startswith('*') or stripped.startswith('**'):
-                    content_start = j
-                    break
-                # Any other non-empty line is also content
-                if stripped:
-                    content_start = j
-                    break
-            translated = '\n'.join(chunk_lines[content_start:])
-        
-        translated_chunks.append(translated)
+    # Chunks are independent requests sharing one prompt; map keeps their order.
+    # API calls are capped by MAX_REQUESTS_IN_FLIGHT across all files.
+    if len(chunks) == 1:
+        translated_chunks = [translate_chunk(chunks[0], prompt)]
+    else:
+        print(f"    Translating {len(chunks)} chunks, up to {MAX_REQUESTS_IN_FLIGHT} at a time...")
+        with ThreadPoolExecutor(max_workers=MAX_REQUESTS_IN_FLIGHT) as executor:
+            translated_chunks = list(executor.map(lambda chunk: translate_chunk(chunk, prompt), chunks))
+    
+    # Remove duplicate headers from subsequent chunks (both # and ## headers)
+    translated_chunks[1:] = [_strip_leading_headers(t) for t in translated_chunks[1:]]
     
     result = '\n\n'.join(translated_chunks)
     
@@ -356,7 +410,7 @@ def translate_simple_text(content: str, mode: TranslationMode = DEFAULT_MODE) ->
             model=CLAUDE_MODEL,
             max_tokens=4096,
             temperature=0.1,
-            system=prompt,
+            system=cached_system(prompt),
             messages=[{"role": "user", "content": content}]
         )
         result = response.content[0].text
@@ -444,9 +498,10 @@ def translate_directory(
     raw_dir: Union[str, Path], 
     trans_dir: Union[str, Path], 
     mode: TranslationMode = DEFAULT_MODE,
-    show_progress: bool = True
+    show_progress: bool = True,
+    concurrency: int = 1
 ) -> DirectoryResult:
-    """Translate all markdown files in a directory."""
+    """Translate all markdown files in a directory, up to `concurrency` at a time."""
     raw_path = Path(raw_dir)
     trans_path = Path(trans_dir)
     
@@ -454,22 +509,23 @@ def translate_directory(
         return {"success": 0, "failed": 0, "files": []}
     
     results: DirectoryResult = {"success": 0, "failed": 0, "files": []}
-    files = sorted(raw_path.rglob('*.md'))
+    files = list_files(raw_path, '.md')
     
     if not files:
         return results
     
     logger.info(f"Found {len(files)} files to translate")
     
-    for i, raw_file in enumerate(files):
+    completed = run_concurrently(
+        lambda raw_file: translate_file(raw_file, trans_path / raw_file.relative_to(raw_path), mode),
+        files, concurrency,
+    )
+    for i, (raw_file, result) in enumerate(completed):
         rel_path = raw_file.relative_to(raw_path)
-        trans_file = trans_path / rel_path
         
         if show_progress:
             print(f"[{i+1}/{len(files)}] {rel_path}")
         
-        result = translate_file(raw_file, trans_file, mode)
-        
         if result.get("success"):
             results["success"] += 1
             results["files"].append(str(rel_path))
@@ -15,22 +15,50 @@ import anthropic
 
 try:
     from .blhxfy import translator
+    from .prompts import cached_system
+    from .translation_cache import response_cache, disable_response_cache
     from ..utils.config import CLAUDE_API_KEY
+    from ..utils.concurrency import run_concurrently
+    from ..utils.files import list_files
 except ImportError:
     import os
     import sys
     sys.path.insert(0, str(Path(__file__).parent))
+    sys.path.insert(0, str(Path(__file__).parent.parent))
     from blhxfy import BLHXFYTranslator
+    from prompts import cached_system
+    from translation_cache import response_cache, disable_response_cache
+    from utils.concurrency import run_concurrently
+    from utils.files import list_files
     translator = BLHXFYTranslator()
     CLAUDE_API_KEY = os.environ.get("CLAUDE_API_KEY", "")
 
 client = anthropic.Anthropic(api_key=CLAUDE_API_KEY, timeout=180.0)
+CSV_MODEL = "claude-sonnet-4-20250514"
 
 
 # =============================================================================
 # CSV DETECTION
 # =============================================================================
 
+def _format_from_headers(headers: Optional[List[str]]) -> Optional[str]:
+    """CSV format type from a header row (see detect_csv_format)."""
+    if not headers:
+        return None
+    
+    headers_lower = [h.lower().strip() for h in headers]
+    
+    # BLHXFY scenario format
+    if 'id' in headers_lower and 'text' in headers_lower and 'trans' in headers_lower:
+        return "blhxfy_scenario"
+    
+    # Simple JP/CN format
+    if len(headers) >= 2:
+        return "simple"
+    
+    return None
+
+
 def detect_csv_format(file_path: Path) -> Optional[str]:
     """
     Detect CSV format type.
@@ -42,67 +70,65 @@ def detect_csv_format(file_path: Path) -> Optional[str]:
     """
     try:
         with open(file_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.reader(f)
-            headers = next(reader, None)
-            
-            if not headers:
-                return None
-            
-            headers_lower = [h.lower().strip() for h in headers]
-            
-            # BLHXFY scenario format
-            if 'id' in headers_lower and 'text' in headers_lower and 'trans' in headers_lower:
-                return "blhxfy_scenario"
-            
-            # Simple JP/CN format
-            if len(headers) >= 2:
-                return "simple"
-            
-            return None
+            return _format_from_headers(next(csv.reader(f), None))
     except Exception:
         return None
 
 
-def count_untranslated(file_path: Path) -> Tuple[int, int]:
+def _scan_csv(file_path: Path) -> Tuple[Optional[str], int, int]:
     """
-    Count untranslated lines in CSV.
+    Detect the format and count lines in one pass over the file.
     
     Returns:
-        (untranslated_count, total_count)
+        (format, untranslated_count, total_count)
     """
-    fmt = detect_csv_format(file_path)
-    if not fmt:
-        return (0, 0)
-    
+    fmt = None
     untranslated = 0
     total = 0
     
     try:
         with open(file_path, 'r', encoding='utf-8-sig') as f:
-            reader = csv.DictReader(f)
+            reader = csv.reader(f)
+            headers = next(reader, None)
+            fmt = _format_from_headers(headers)
+            if not fmt:
+                return (None, 0, 0)
+            
+            # Columns by exact header name (last one wins, as with DictReader);
+            # the simple format reads the first two columns
+            columns = {name: i for i, name in enumerate(headers)}
+            if fmt == "blhxfy_scenario":
+                col_id, col_src, col_tgt = (columns.get(k) for k in ('id', 'text', 'trans'))
+            else:
+                col_id, col_src, col_tgt = None, 0, 1
+            
+            def cell(row, col):
+                return row[col] if col is not None and col < len(row) else ''
+            
             for row in reader:
-                if fmt == "blhxfy_scenario":
-                    if row.get('id', '').lower() == 'info':
-                        continue
-                    text = row.get('text', '').strip()
-                    trans = row.get('trans', '').strip()
-                    if text and not trans:
+                if not row:
+                    continue
+                if col_id is not None and cell(row, col_id).lower() == 'info':
+                    continue
+                src = cell(row, col_src).strip()
+                if src:
+                    total += 1
+                    if not cell(row, col_tgt).strip():
                         untranslated += 1
-                    if text:
-                        total += 1
-                else:
-                    # Simple format - first column is source
-                    keys = list(row.keys())
-                    if len(keys) >= 2:
-                        src = row.get(keys[0], '').strip()
-                        tgt = row.get(keys[1], '').strip()
-                        if src and not tgt:
-                            untranslated += 1
-                        if src:
-                            total += 1
     except Exception:
         pass
     
+    return (fmt, untranslated, total)
+
+
+def count_untranslated(file_path: Path) -> Tuple[int, int]:
+    """
+    Count untranslated lines in CSV.
+    
+    Returns:
+        (untranslated_count, total_count)
+    """
+    _, untranslated, total = _scan_csv(file_path)
     return (untranslated, total)
 
 
@@ -134,30 +160,52 @@ def build_csv_translate_prompt() -> str:
 直接输出JSON，不要添加说明。"""
 
 
+# JP text -> CN translation, reused across files in this process
+_jp_translations: Dict[str, str] = {}
+
+
 def batch_translate_jp_texts(texts: List[str], batch_size: int = 20) -> Dict[int, str]:
     """Batch translate Japanese texts to Chinese."""
     if not texts:
         return {}
     
+    # Send each distinct text once, skipping ones translated in earlier files
+    unique = [t for t in dict.fromkeys(texts) if t not in _jp_translations]
+    for i, translation in _batch_translate_unique(unique, batch_size).items():
+        _jp_translations[unique[i]] = translation
+    
+    return {i: _jp_translations[t] for i, t in enumerate(texts) if t in _jp_translations}
+
+
+def _batch_translate_unique(texts: List[str], batch_size: int) -> Dict[int, str]:
+    """Translate texts in API batches; result keys are indexes into texts."""
+    if not texts:
+        return {}
+    
     all_translations = {}
     prompt = build_csv_translate_prompt()
+    cache = response_cache()
     
     for batch_start in range(0, len(texts), batch_size):
         batch_end = min(batch_start + batch_size, len(texts))
         batch = texts[batch_start:batch_end]
         
         input_json = {str(i): t for i, t in enumerate(batch)}
+        user_content = json.dumps(input_json, ensure_ascii=False)
+        key = cache.prompt_key("claude", CSV_MODEL, prompt, user_content) if cache else None
         
         try:
-            response = client.messages.create(
-                model="claude-sonnet-4-20250514",
-                max_tokens=4096,
-                temperature=0.1,
-                system=prompt,
-                messages=[{"role": "user", "content": json.dumps(input_json, ensure_ascii=False)}]
-            )
-            
-            result_text = response.content[0].text.strip()
+            result_text = cache.get(key) if key else None
+            fresh = result_text is None
+            if fresh:
+                response = client.messages.create(
+                    model=CSV_MODEL,
+                    max_tokens=4096,
+                    temperature=0.1,
+                    system=cached_system(prompt),
+                    messages=[{"role": "user", "content": user_content}]
+                )
+                result_text = response.content[0].text.strip()
             
             # Extract JSON from response
             if '{' in result_text:
@@ -167,6 +215,10 @@ def batch_translate_jp_texts(texts: List[str], batch_size: int = 20) -> Dict[int
                 for local_idx, translation in parsed.items():
                     global_idx = batch_start + int(local_idx)
                     all_translations[global_idx] = translation
+                
+                # Only responses that parsed are worth replaying
+                if key and fresh:
+                    cache.put_many("claude", CSV_MODEL, {key: result_text})
                     
         except Exception as e:
             print(f"      Batch translation error: {e}")
@@ -281,7 +333,8 @@ def translate_csv_directory(
     input_dir: Path,
     output_dir: Optional[Path] = None,
     overwrite: bool = False,
-    only_untranslated: bool = True
+    only_untranslated: bool = True,
+    concurrency: int = 1
 ) -> Dict:
     """
     Translate all CSV files in a directory.
@@ -291,6 +344,7 @@ def translate_csv_directory(
         output_dir: Output directory (None = in-place)
         overwrite: Overwrite existing translations
         only_untranslated: Only process files with untranslated content
+        concurrency: Files translated in parallel
     
     Returns:
         {"success": int, "failed": int, "skipped": int, "files": list}
@@ -300,12 +354,12 @@ def translate_csv_directory(
     
     results = {"success": 0, "failed": 0, "skipped": 0, "files": []}
     
-    csv_files = list(input_path.rglob("*.csv"))
+    csv_files = list_files(input_path, ".csv")
     print(f"Found {len(csv_files)} CSV files")
     
+    tasks = []
     for i, csv_file in enumerate(csv_files):
         rel_path = csv_file.relative_to(input_path)
-        out_file = output_path / rel_path
         
         # Check if translation needed
         if only_untranslated:
@@ -317,8 +371,13 @@ def translate_csv_directory(
         else:
             print(f"[{i+1}/{len(csv_files)}] {rel_path}")
         
-        result = translate_csv_file(csv_file, out_file, overwrite)
-        
+        tasks.append((csv_file, rel_path))
+    
+    completed = run_concurrently(
+        lambda task: translate_csv_file(task[0], output_path / task[1], overwrite),
+        tasks, concurrency,
+    )
+    for (_, rel_path), result in completed:
         if result.get("success"):
             results["success"] += 1
             results["files"].append({
@@ -327,7 +386,7 @@ def translate_csv_directory(
             })
         else:
             results["failed"] += 1
-            print(f"    Error: {result.get('error')}")
+            print(f"    Error: {rel_path}: {result.get('error')}")
     
     return results
 
@@ -361,8 +420,8 @@ def analyze_csv_directory(dir_path: Path) -> Dict:
         "files": []
     }
     
-    for csv_file in Path(dir_path).rglob("*.csv"):
-        untrans, total = count_untranslated(csv_file)
+    for csv_file in list_files(dir_path, ".csv"):
+        _, untrans, total = _scan_csv(csv_file)
         
         result["total_files"] += 1
         result["total_lines"] += total
@@ -397,10 +456,15 @@ if __name__ == "__main__":
     parser.add_argument("path", help="File or directory path")
     parser.add_argument("-o", "--output", help="Output path (optional)")
     parser.add_argument("--overwrite", action="store_true", help="Overwrite existing translations")
+    parser.add_argument("--concurrency", type=int, default=4, help="Files translated in parallel (default: 4)")
+    parser.add_argument("--no-cache", action="store_true", help="Always call the API (skip the response cache)")
     
     args = parser.parse_args()
     path = Path(args.path)
     
+    if args.no_cache:
+        disable_response_cache()
+    
     if args.command == "analyze":
         if path.is_dir():
             result = analyze_csv_directory(path)
@@ -430,6 +494,6 @@ if __name__ == "__main__":
             result = translate_csv_file(path, output, args.overwrite)
             print(f"Result: {result}")
         else:
-            result = translate_csv_directory(path, output, args.overwrite)
+            result = translate_csv_directory(path, output, args.overwrite, concurrency=args.concurrency)
             print(f"\nDone: {result['success']} success, {result['failed']} failed, {result['skipped']} skipped")
 
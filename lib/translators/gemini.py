@@ -28,10 +28,12 @@ except ImportError:
 
 try:
     from ..utils.config import Config
+    from ..utils.concurrency import run_concurrently
 except ImportError:
     import sys
     sys.path.insert(0, str(Path(__file__).parent.parent))
     from utils.config import Config
+    from utils.concurrency import run_concurrently
 
 # Config
 config = Config.load()
@@ -114,10 +116,21 @@ def fix_repetition(text: str, max_repeat: int = 10) -> str:
     return text
 
 
+_client = None
+
+
+def get_client():
+    """Get the shared Gemini client (new SDK only)."""
+    global _client
+    if _client is None:
+        _client = genai.Client(api_key=GEMINI_API_KEY)
+    return _client
+
+
 def translate_chunk(prompt: str) -> str:
     """Translate a single chunk."""
     if USE_NEW_SDK:
-        client = genai.Client(api_key=GEMINI_API_KEY)
+        client = get_client()
         response = client.models.generate_content(
             model=GEMINI_MODEL,
             contents=prompt,
@@ -207,8 +220,8 @@ def translate_file(input_path: str, output_path: str) -> bool:
     return True
 
 
-def translate_directory(input_dir: str, output_dir: str) -> int:
-    """Translate all markdown files in directory."""
+def translate_directory(input_dir: str, output_dir: str, concurrency: int = 1) -> int:
+    """Translate all markdown files in directory, up to `concurrency` at a time."""
     input_p = Path(input_dir)
     output_p = Path(output_dir)
     
@@ -224,11 +237,17 @@ def translate_directory(input_dir: str, output_dir: str) -> int:
     print(f"Gemini: Translating {len(files)} files with {GEMINI_MODEL}")
     
     count = 0
-    for md_file in sorted(files):
-        output_file = output_p / md_file.name
-        print(f"\n[{count+1}/{len(files)}] {md_file.name}")
-        if translate_file(str(md_file), str(output_file)):
+    results = run_concurrently(
+        lambda md_file: translate_file(str(md_file), str(output_p / md_file.name)),
+        sorted(files), concurrency, return_exceptions=True,
+    )
+    for done, (md_file, result) in enumerate(results, 1):
+        if isinstance(result, Exception):
+            print(f"\n[{done}/{len(files)}] Failed: {md_file.name} ({result})")
+            continue
+        if result:
             count += 1
+        print(f"\n[{done}/{len(files)}] {md_file.name}")
     
     return count
 
@@ -23,10 +23,12 @@ from openai import OpenAI
 
 try:
     from ..utils.config import Config
+    from ..utils.concurrency import run_concurrently
 except ImportError:
     import sys
     sys.path.insert(0, str(Path(__file__).parent.parent))
     from utils.config import Config
+    from utils.concurrency import run_concurrently
 
 # Config
 config = Config.load()
@@ -34,11 +36,17 @@ OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY", "")
 OPENAI_MODEL = getattr(config.translation, 'openai_model', 'gpt-4o-mini')
 
 
+_client = None
+
+
 def get_client() -> OpenAI:
-    """Get OpenAI client."""
+    """Get the shared OpenAI client (its connection pool is reused across files)."""
+    global _client
     if not OPENAI_API_KEY:
         raise ValueError("OPENAI_API_KEY not set. Add to .env file.")
-    return OpenAI(api_key=OPENAI_API_KEY)
+    if _client is None:
+        _client = OpenAI(api_key=OPENAI_API_KEY)
+    return _client
 
 
 def get_terminology(content: str = "") -> str:
@@ -180,8 +188,8 @@ def translate_file(input_path: str, output_path: str) -> bool:
     return True
 
 
-def translate_directory(input_dir: str, output_dir: str) -> int:
-    """Translate all markdown files in directory."""
+def translate_directory(input_dir: str, output_dir: str, concurrency: int = 1) -> int:
+    """Translate all markdown files in directory, up to `concurrency` at a time."""
     input_p = Path(input_dir)
     output_p = Path(output_dir)
     
@@ -197,11 +205,17 @@ def translate_directory(input_dir: str, output_dir: str) -> int:
     print(f"OpenAI: Translating {len(files)} files with {OPENAI_MODEL}")
     
     count = 0
-    for md_file in sorted(files):
-        output_file = output_p / md_file.name
-        print(f"\n[{count+1}/{len(files)}] {md_file.name}")
-        if translate_file(str(md_file), str(output_file)):
+    results = run_concurrently(
+        lambda md_file: translate_file(str(md_file), str(output_p / md_file.name)),
+        sorted(files), concurrency, return_exceptions=True,
+    )
+    for done, (md_file, result) in enumerate(results, 1):
+        if isinstance(result, Exception):
+            print(f"\n[{done}/{len(files)}] Failed: {md_file.name} ({result})")
+            continue
+        if result:
             count += 1
+        print(f"\n[{done}/{len(files)}] {md_file.name}")
     
     return count
 
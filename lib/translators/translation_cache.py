@@ -0,0 +1,122 @@
+"""
+Persistent translation cache.
+
+Stores finished translations in SQLite, keyed by a hash of
+(engine, model, prompt version, exact prompt, source content), so unchanged
+files are not sent to the API again on re-runs. Prompts embed the glossary,
+so a glossary update misses the cache (see prompt_key).
+
+Usage:
+    from lib.translators.translation_cache import TranslationCache
+    cache = TranslationCache()
+    key = cache.prompt_key("openai", "gpt-4o-mini", prompt, content)
+    cache.put_many("openai", "gpt-4o-mini", {key: translation})
+"""
+import hashlib
+import sqlite3
+import functools
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+CACHE_FILE = Path(__file__).parent / "translation_cache.sqlite"
+
+# Bump when prompts change so older translations are no longer reused
+PROMPT_VERSION = 1
+
+# Turned off by --no-cache (disable_response_cache)
+USE_CACHE = True
+
+
+class TranslationCache:
+    """SQLite-backed (engine, model, content) -> translation store."""
+    
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path) if path else CACHE_FILE
+        self._db: Optional[sqlite3.Connection] = None
+        # One connection shared by translator threads, used under this lock
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(engine: str, model: str, content_digest: bytes) -> str:
+        """Cache key (hex) for a source file's content digest."""
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"{engine}\0{model}\0{PROMPT_VERSION}\0".encode('utf-8'))
+        h.update(content_digest)
+        return h.hexdigest()
+    
+    @classmethod
+    def prompt_key(cls, engine: str, model: str, prompt: str, content: str) -> str:
+        """Cache key (hex) for one API call: exact system prompt plus input."""
+        digest = hashlib.blake2b(f"{prompt}\0{content}".encode('utf-8'), digest_size=16).digest()
+        return cls.key(engine, model, digest)
+    
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations "
+                "(hash BLOB PRIMARY KEY, engine TEXT, model TEXT, translation BLOB)"
+            )
+        return self._db
+    
+    def get_many(self, keys: Iterable[str]) -> Dict[str, str]:
+        """Cached translations for the given keys (misses are left out)."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        found = {}
+        with self._lock:
+            db = self._connect()
+            # Stay under SQLite's bound-parameter limit
+            for i in range(0, len(keys), 500):
+                chunk = [bytes.fromhex(k) for k in keys[i:i + 500]]
+                placeholders = ",".join("?" * len(chunk))
+                for hash_, translation in db.execute(
+                    f"SELECT hash, translation FROM translations WHERE hash IN ({placeholders})", chunk
+                ):
+                    found[hash_.hex()] = translation.decode('utf-8')
+        return found
+    
+    def get(self, key: str) -> Optional[str]:
+        """Cached translation for one key, or None."""
+        return self.get_many([key]).get(key)
+    
+    def put_many(self, engine: str, model: str, translations: Dict[str, str]):
+        """Store translations by key, in one transaction."""
+        if not translations:
+            return
+        with self._lock:
+            db = self._connect()
+            with db:
+                db.executemany(
+                    "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)",
+                    [
+                        (bytes.fromhex(k), engine, model, text.encode('utf-8'))
+                        for k, text in translations.items()
+                    ],
+                )
+    
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+
+@functools.lru_cache(maxsize=1)
+def _shared_cache() -> TranslationCache:
+    return TranslationCache()
+
+
+def response_cache() -> Optional[TranslationCache]:
+    """Process-wide cache for direct API calls, or None when USE_CACHE is off."""
+    return _shared_cache() if USE_CACHE else None
+
+
+def disable_response_cache():
+    """Make direct API calls skip the cache for the rest of the process."""
+    global USE_CACHE
+    USE_CACHE = False
@@ -13,7 +13,7 @@ from typing import Dict, List, TYPE_CHECKING
 if TYPE_CHECKING:
     from anthropic import Anthropic
 
-from .prompts import build_jp_translate_prompt, build_batch_jp_prompt
+from .prompts import build_jp_translate_prompt, build_batch_jp_prompt, cached_system
 
 
 def is_voice_table(content: str) -> bool:
@@ -64,7 +64,7 @@ def translate_jp_text(client: "Anthropic", model: str, text: str) -> str:
             model=model,
             max_tokens=256,
             temperature=0.1,
-            system=prompt,
+            system=cached_system(prompt),
             messages=[{"role": "user", "content": text}]
         )
         return response.content[0].text.strip()
@@ -77,7 +77,9 @@ def batch_translate_jp(client: "Anthropic", model: str, texts: List[str]) -> Dic
     if not texts:
         return {}
     
-    input_json = {str(i): t for i, t in enumerate(texts)}
+    # Repeated lines (labels, SE cues) are sent once and fanned back out
+    unique = list(dict.fromkeys(texts))
+    input_json = {str(i): t for i, t in enumerate(unique)}
     prompt = build_batch_jp_prompt()
     
     try:
@@ -85,7 +87,7 @@ def batch_translate_jp(client: "Anthropic", model: str, texts: List[str]) -> Dic
             model=model,
             max_tokens=4096,
             temperature=0.1,
-            system=prompt,
+            system=cached_system(prompt),
             messages=[{"role": "user", "content": json.dumps(input_json, ensure_ascii=False)}]
         )
         
@@ -93,7 +95,8 @@ def batch_translate_jp(client: "Anthropic", model: str, texts: List[str]) -> Dic
         if '{' in result_text:
             json_str = result_text[result_text.index('{'):result_text.rindex('}')+1]
             parsed = json.loads(json_str)
-            return {int(k): v for k, v in parsed.items()}
+            by_text = {unique[int(k)]: v for k, v in parsed.items() if int(k) < len(unique)}
+            return {i: by_text[t] for i, t in enumerate(texts) if t in by_text}
     except Exception as e:
         print(f"    Batch error: {e}")
     
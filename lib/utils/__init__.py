@@ -10,6 +10,8 @@ from .exceptions import (
     APIError,
     FileOperationError
 )
+from .files import scan_files, list_files
+from .concurrency import RateLimiter, run_concurrently
 
 __all__ = [
     # Logger
@@ -24,4 +26,10 @@ __all__ = [
     'ConfigError',
     'APIError',
     'FileOperationError',
+    # Files
+    'scan_files',
+    'list_files',
+    # Concurrency
+    'RateLimiter',
+    'run_concurrently',
 ]
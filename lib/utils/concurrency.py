@@ -0,0 +1,61 @@
+"""
+Concurrency helpers for GBF tools.
+
+Usage:
+    from lib.utils.concurrency import RateLimiter, run_concurrently
+    
+    limiter = RateLimiter(3.0)  # shared by every worker thread
+    limiter.wait()              # before each request
+    
+    for path, result in run_concurrently(translate_file, files, concurrency=4):
+        ...
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, Iterator, Tuple, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+class RateLimiter:
+    """Spaces request starts at least 1/rps seconds apart, across threads."""
+    
+    def __init__(self, rps: float):
+        self.interval = 1.0 / rps
+        self._next = 0.0
+        self._lock = threading.Lock()
+    
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+def run_concurrently(
+    fn: Callable[[T], R],
+    items: Iterable[T],
+    concurrency: int = 1,
+    return_exceptions: bool = False
+) -> Iterator[Tuple[T, R]]:
+    """
+    Call fn on every item from a thread pool, yielding (item, result) as each finishes.
+    
+    For calls that block on the network (API requests), so up to
+    concurrency round-trips overlap. An exception from fn is raised from
+    the iterator, or yielded as the result if return_exceptions is set.
+    """
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+        futures = {executor.submit(fn, item): item for item in items}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                result = e
+            yield futures[future], result
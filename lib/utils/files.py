@@ -0,0 +1,48 @@
+"""
+Directory walking helpers for GBF tools.
+
+Usage:
+    from lib.utils.files import list_files
+    
+    for md_file in list_files("raw/", ".md"):
+        ...
+"""
+import os
+from pathlib import Path
+from typing import List, Tuple, Union
+
+
+def scan_files(
+    root: Union[str, Path],
+    suffix: str,
+    recursive: bool = True
+) -> List[Tuple[str, os.DirEntry]]:
+    """
+    Sorted (path, DirEntry) for files ending in suffix under root.
+    
+    Walks with os.scandir, so file/dir checks come from the directory
+    entries instead of a stat per path like Path.rglob. Hidden directories
+    (.git, .batch, ...) are not descended into and symlinked directories
+    are not followed. Paths sort by component, the same order as
+    sorted(Path.rglob(...)).
+    """
+    found = []
+    stack = [str(root)]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and not entry.name.startswith('.'):
+                            stack.append(entry.path)
+                    elif entry.name.endswith(suffix) and entry.is_file():
+                        found.append((entry.path, entry))
+        except OSError:
+            continue
+    found.sort(key=lambda item: item[0].split(os.sep))
+    return found
+
+
+def list_files(root: Union[str, Path], suffix: str, recursive: bool = True) -> List[Path]:
+    """Sorted files ending in suffix under root (see scan_files)."""
+    return [Path(p) for p, _ in scan_files(root, suffix, recursive)]
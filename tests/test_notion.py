@@ -9,8 +9,13 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from lib.notion.sync import sha1_text, normalize_text_for_diff
-from lib.notion.content import render_story_blocks, parse_cast_table
+from lib.notion.sync import (
+    sha1_text,
+    normalize_text_for_diff,
+    blocks_plain_text,
+    hash_blocks_normalized,
+)
+from lib.notion.content import render_story_blocks, parse_cast_table, parse_voice_table
 
 
 class TestSyncUtils:
@@ -37,6 +42,13 @@ class TestSyncUtils:
         # Same text should normalize to same result
         assert norm1 == norm2
 
+    def test_hash_blocks_normalized(self):
+        """Fused hash should match normalize + sha1 over the joined text."""
+        blocks = render_story_blocks("# Title\r\n\r\n**Vajra:** Hi  \n\n\n\nLine\r")
+        expected = sha1_text(normalize_text_for_diff(blocks_plain_text(blocks)))
+
+        assert hash_blocks_normalized(blocks) == expected
+
 
 class TestContentRendering:
     """Tests for content rendering functions."""
@@ -72,6 +84,80 @@ This is a paragraph.
         assert isinstance(rows, list)
         # Depending on implementation, may have rows or not
 
+    def test_parse_voice_table(self):
+        """Should map columns by header and keep empty cells."""
+        voice_md = """# Battle
+
+| Label | Japanese | Chinese | Audio |
+| --- | --- | --- | --- |
+| Attack | やあっ！ | 呀！ | [mp3](https://example.com/a.mp3) |
+|  | えいっ！ |  |  |
+"""
+        rows = parse_voice_table(voice_md)
+
+        assert rows[0] == {
+            'Label': 'Attack',
+            'Japanese': 'やあっ！',
+            'Chinese': '呀！',
+            'Audio': 'https://example.com/a.mp3',
+        }
+        assert rows[1] == {'Label': 'Attack #2', 'Japanese': 'えいっ！'}
+
+
+class TestAdaptiveLimiter:
+    """Tests for the Notion write limiter."""
+
+    def test_retries_throttled_call(self):
+        """Should back off and retry on 429, then succeed."""
+        from lib.notion.sync import AdaptiveLimiter
+
+        class Throttled(Exception):
+            status = 429
+
+        calls = []
+
+        def flaky():
+            calls.append(1)
+            if len(calls) == 1:
+                raise Throttled()
+            return "ok"
+
+        limiter = AdaptiveLimiter(base_interval=0.001)
+        assert limiter.call(flaky) == "ok"
+        assert len(calls) == 2
+        assert limiter.interval > 0
+
+    def test_non_retryable_error_raises(self):
+        """Should not retry errors without a retryable status."""
+        from lib.notion.sync import AdaptiveLimiter
+
+        def broken():
+            raise ValueError("bad")
+
+        with pytest.raises(ValueError):
+            AdaptiveLimiter().call(broken)
+
+
+class TestDatabaseRows:
+    """Tests for database row writes (mock client, no API calls)."""
+
+    def test_unchanged_row_skips_update(self):
+        """Should only PATCH a row when its payload hash changes."""
+        from unittest.mock import MagicMock
+        from lib.notion.database import _cast_properties, _write_row
+
+        client = MagicMock()
+        row_hashes = {}
+        props = _cast_properties("Vajra", "https://example.com/v.png", None)
+
+        _write_row(client, "ds", "row-1", props, row_hashes)
+        _write_row(client, "ds", "row-1", props, row_hashes)
+        assert client.pages.update.call_count == 1
+
+        changed = _cast_properties("Vajra", "https://example.com/v2.png", None)
+        _write_row(client, "ds", "row-1", changed, row_hashes)
+        assert client.pages.update.call_count == 2
+
 
 class TestSyncContext:
     """Tests for SyncContext (mock tests, no API calls)."""
@@ -61,6 +61,17 @@ class TestBLHXFYTranslator:
         # Unknown character returns None
         result = translator.smart_lookup("UnknownChar")
         assert result is None
+        
+        # Cached misses still honor fallback_format
+        assert translator.smart_lookup("UnknownChar", fallback_format=True) == "UnknownChar"
+        assert translator.smart_lookup("Lyria") == "露莉亚"
+    
+    def test_find_similar_names(self):
+        """Similar-name search should be case-insensitive and limited."""
+        similar = translator.find_similar_names("LYR", limit=3)
+        assert "Lyria" in similar or len(similar) == 3
+        assert all("lyr" in name.lower() for name in similar)
+        assert len(similar) <= 3
     
     def test_nouns_loaded(self):
         """Noun mappings should be loaded."""
@@ -80,6 +91,14 @@ class TestBLHXFYTranslator:
             wrong, correct = next(iter(translator.noun_fixes.items()))
             result = translator.apply_post_translation(wrong)
             assert result == correct
+    
+    def test_replacer_prefers_longest_term(self):
+        """Longer terms should win over shorter ones sharing a prefix."""
+        from lib.translators.blhxfy import _build_replacer
+        
+        replace = _build_replacer({"Noa": "诺亚"}, {"Noah": "诺瓦", "Captain": "团长"})
+        assert replace("Noah and Noa met the Captain") == "诺瓦 and 诺亚 met the 团长"
+        assert _build_replacer({})("unchanged") == "unchanged"
 
 
 class TestClaudeTranslator: